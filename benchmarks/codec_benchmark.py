@@ -0,0 +1,78 @@
+"""Compare the per-request CPU time of the model instance/json path with the compiled codec.
+
+Run from the repository root with `python -m benchmarks.codec_benchmark`.
+"""
+import json
+import timeit
+
+from custom_components.cosa.codec import SERIALIZER, encode, loads
+from custom_components.cosa.models.temperature import SetTargetTemperaturesRequest, TargetTemperatures
+from custom_components.cosa.state import EndpointState
+
+NUMBER = 20000
+
+ENDPOINT_PAYLOAD = json.dumps({
+    "ok": 1,
+    "endpoint": {
+        "id": "5f1e0c0c0c0c0c0c0c0c0c0c",
+        "name": "Living Room",
+        "mode": "manual",
+        "option": "home",
+        "previousOption": "sleep",
+        "temperature": 21.4,
+        "humidity": 48.2,
+        "targetTemperature": 22.0,
+        "homeTemperature": 22.0,
+        "awayTemperature": 17.0,
+        "sleepTemperature": 19.0,
+        "customTemperature": 21.0,
+        "combiState": "on",
+        "calibration": 0.0,
+        "combiSettings": {"heating": True, "pidWindowLow": 0.2, "pidWindowHigh": 0.3},
+        "schedule": {day: [{"start": hour * 60, "option": "home"} for hour in range(24)] for day in range(7)},
+        "firmware": {"version": "1.2.3", "build": 456},
+        "wifi": {"ssid": "home", "rssi": -55},
+    },
+}).encode()
+
+
+def legacy_encode():
+    dto = SetTargetTemperaturesRequest(
+        endpoint="5f1e0c0c0c0c0c0c0c0c0c0c",
+        targetTemperatures=TargetTemperatures(away=17.0, custom=21.0, home=22.5, sleep=19.0),
+    )
+    return json.dumps(dto.dict()).encode()
+
+
+def codec_encode():
+    return encode(
+        SetTargetTemperaturesRequest,
+        endpoint="5f1e0c0c0c0c0c0c0c0c0c0c",
+        targetTemperatures=dict(away=17.0, custom=21.0, home=22.5, sleep=19.0),
+    )
+
+
+def legacy_decode():
+    return json.loads(ENDPOINT_PAYLOAD.decode())["endpoint"]
+
+
+def codec_decode():
+    return EndpointState.from_payload(loads(ENDPOINT_PAYLOAD)["endpoint"])
+
+
+def report(name, legacy, compiled):
+    legacy_time = min(timeit.repeat(legacy, number=NUMBER, repeat=5)) / NUMBER * 1e6
+    compiled_time = min(timeit.repeat(compiled, number=NUMBER, repeat=5)) / NUMBER * 1e6
+    print("%-8s legacy %7.2f us  codec %7.2f us  speedup %.1fx" % (
+        name, legacy_time, compiled_time, legacy_time / compiled_time))
+
+
+def main():
+    assert json.loads(legacy_encode()) == loads(codec_encode())
+    print("serializer: %s" % SERIALIZER)
+    report("encode", legacy_encode, codec_encode)
+    report("decode", legacy_decode, codec_decode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""A local stand-in for the Cosa cloud, serving the API paths used by the integration.
+
+Run it standalone with `python -m benchmarks.fake_cosa_server --endpoints 50` and point `CosaApi(host=...)`
+at the printed URL, or start it from a benchmark through `FakeCosaServer`.
+"""
+import argparse
+import asyncio
+import random
+import secrets
+from collections import Counter
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+OPTIONS = ("home", "sleep", "away", "custom", "frozen")
+
+
+@dataclass
+class LatencyProfile:
+    """Response latency in seconds, drawn per request."""
+
+    distribution: str = "constant"
+    mean: float = 0.0
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.spread, self.mean + self.spread))
+        if self.distribution == "lognormal":
+            return rng.lognormvariate(0, self.spread) * self.mean if self.mean else 0.0
+        if self.distribution == "exponential":
+            return rng.expovariate(1 / self.mean) if self.mean else 0.0
+        return self.mean
+
+
+@dataclass
+class ErrorProfile:
+    """Probabilities of injected failures per request."""
+
+    http_error_rate: float = 0.0
+    api_error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout: float = 30.0
+    expire_token_after: int | None = None
+    paths: tuple[str, ...] = ()
+
+    def applies_to(self, path: str) -> bool:
+        return not self.paths or path in self.paths
+
+
+@dataclass
+class FakeCosaServer:
+    endpoints: int = 10
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    errors: ErrorProfile = field(default_factory=ErrorProfile)
+    change_rate: float = 0.1
+    list_fields: tuple[str, ...] = ("id", "name")
+    email: str = "user@example.com"
+    password: str = "password"
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+        self.requests: Counter = Counter()
+        self.tokens: dict[str, int] = {}
+        self.state: dict[str, dict] = {}
+        for index in range(self.endpoints):
+            self.add_endpoint("Room %d" % index)
+
+        self._runner: web.AppRunner | None = None
+        self.url: str | None = None
+
+    def add_endpoint(self, name: str) -> str:
+        endpoint_id = secrets.token_hex(12)
+        option = self.rng.choice(OPTIONS[:4])
+        self.state[endpoint_id] = {
+            "id": endpoint_id,
+            "name": name,
+            "mode": "manual",
+            "option": option,
+            "previousOption": "home",
+            "temperature": round(self.rng.uniform(17, 24), 1),
+            "humidity": round(self.rng.uniform(30, 60), 1),
+            "targetTemperature": 21.0,
+            "homeTemperature": 21.0,
+            "awayTemperature": 17.0,
+            "sleepTemperature": 19.0,
+            "customTemperature": 22.0,
+            "combiState": self.rng.choice(("on", "off")),
+            "calibration": 0.0,
+            "combiSettings": {"heating": True, "pidWindowLow": 0.2, "pidWindowHigh": 0.3},
+            "schedule": {str(day): [{"start": hour * 60, "option": "home"} for hour in range(24)]
+                         for day in range(7)},
+        }
+        return endpoint_id
+
+    def remove_endpoint(self, endpoint_id: str) -> None:
+        self.state.pop(endpoint_id, None)
+
+    def tick(self) -> None:
+        """Let a share of the thermostats drift, as if time passed between two polls."""
+        for endpoint in self.state.values():
+            if self.rng.random() < self.change_rate:
+                endpoint["temperature"] = round(endpoint["temperature"] + self.rng.choice((-0.1, 0.1)), 1)
+                if self.rng.random() < 0.2:
+                    endpoint["combiState"] = "off" if endpoint["combiState"] == "on" else "on"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/api/users/login", self._login)
+        app.router.add_post("/api/endpoints/getEndpoints", self._get_endpoints)
+        app.router.add_post("/api/endpoints/getEndpoint", self._get_endpoint)
+        app.router.add_post("/api/endpoints/setMode", self._set_mode)
+        app.router.add_post("/api/endpoints/setOption", self._set_option)
+        app.router.add_post("/api/endpoints/setTargetTemperatures", self._set_target_temperatures)
+        app.router.add_post("/api/endpoints/setCombiSettings", self._set_combi_settings)
+        app.router.add_post("/api/endpoints/setDeviceSettings", self._set_device_settings)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = "http://%s:%d" % (host, port)
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request, auth: bool = True) -> tuple[dict | None, web.Response | None]:
+        path = request.path.lstrip("/")
+        self.requests[path] += 1
+
+        await asyncio.sleep(self.latency.sample(self.rng))
+        if self.errors.applies_to(path):
+            if self.rng.random() < self.errors.timeout_rate:
+                await asyncio.sleep(self.errors.timeout)
+            if self.rng.random() < self.errors.http_error_rate:
+                return None, web.Response(status=503)
+            if self.rng.random() < self.errors.api_error_rate:
+                return None, web.json_response({"ok": 0, "error": [{"message": "Injected error"}]})
+
+        if auth:
+            token = request.headers.get("authToken")
+            if token not in self.tokens:
+                return None, web.json_response({"ok": 0, "code": 104})
+            self.tokens[token] += 1
+            if self.errors.expire_token_after is not None and self.tokens[token] > self.errors.expire_token_after:
+                del self.tokens[token]
+                return None, web.json_response({"ok": 0, "code": 104})
+
+        return await request.json(), None
+
+    def _endpoint(self, body: dict) -> dict | None:
+        return self.state.get(body.get("endpoint"))
+
+    async def _login(self, request: web.Request) -> web.Response:
+        body, error = await self._handle(request, auth=False)
+        if error is not None:
+            return error
+        if body.get("email") != self.email or body.get("password") != self.password:
+            return web.json_response({"ok": 0, "code": 111})
+
+        token = secrets.token_hex(16)
+        self.tokens[token] = 0
+        return web.json_response({"ok": 1, "authToken": token})
+
+    async def _get_endpoints(self, request: web.Request) -> web.Response:
+        body, error = await self._handle(request)
+        if error is not None:
+            return error
+        endpoints = [{key: x[key] for key in self.list_fields if key in x} for x in self.state.values()]
+        return web.json_response({"ok": 1, "endpoints": endpoints})
+
+    async def _get_endpoint(self, request: web.Request) -> web.Response:
+        body, error = await self._handle(request)
+        if error is not None:
+            return error
+        endpoint = self._endpoint(body)
+        if endpoint is None:
+            return web.json_response({"ok": 0, "code": 404, "error": [{"message": "Endpoint not found"}]})
+        return web.json_response({"ok": 1, "endpoint": endpoint})
+
+    async def _set(self, request: web.Request, update) -> web.Response:
+        body, error = await self._handle(request)
+        if error is not None:
+            return error
+        endpoint = self._endpoint(body)
+        if endpoint is None:
+            return web.json_response({"ok": 0, "code": 404, "error": [{"message": "Endpoint not found"}]})
+        update(endpoint, body)
+        return web.json_response({"ok": 1})
+
+    async def _set_mode(self, request: web.Request) -> web.Response:
+        def update(endpoint, body):
+            endpoint["mode"] = body["mode"]
+            endpoint["option"] = body["option"]
+
+        return await self._set(request, update)
+
+    async def _set_option(self, request: web.Request) -> web.Response:
+        def update(endpoint, body):
+            endpoint["previousOption"] = endpoint["option"]
+            endpoint["option"] = body["option"]
+            if body["option"] in ("home", "sleep", "away", "custom"):
+                endpoint["targetTemperature"] = endpoint["%sTemperature" % body["option"]]
+
+        return await self._set(request, update)
+
+    async def _set_target_temperatures(self, request: web.Request) -> web.Response:
+        def update(endpoint, body):
+            for option, temperature in body["targetTemperatures"].items():
+                endpoint["%sTemperature" % option] = temperature
+            if endpoint["option"] in body["targetTemperatures"]:
+                endpoint["targetTemperature"] = body["targetTemperatures"][endpoint["option"]]
+
+        return await self._set(request, update)
+
+    async def _set_combi_settings(self, request: web.Request) -> web.Response:
+        def update(endpoint, body):
+            endpoint["combiSettings"] = body["combiSettings"]
+
+        return await self._set(request, update)
+
+    async def _set_device_settings(self, request: web.Request) -> web.Response:
+        def update(endpoint, body):
+            endpoint["calibration"] = body["calibration"]
+
+        return await self._set(request, update)
+
+
+async def _serve(args) -> None:
+    server = FakeCosaServer(
+        endpoints=args.endpoints,
+        latency=LatencyProfile(args.latency, args.latency_mean, args.latency_spread),
+        errors=ErrorProfile(http_error_rate=args.http_error_rate, api_error_rate=args.api_error_rate),
+    )
+    url = await server.start(port=args.port)
+    print("Fake Cosa cloud with %d endpoints listening on %s (%s / %s)" % (
+        args.endpoints, url, server.email, server.password))
+    try:
+        while True:
+            await asyncio.sleep(10)
+            server.tick()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--endpoints", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", choices=("constant", "uniform", "lognormal", "exponential"),
+                        default="constant")
+    parser.add_argument("--latency-mean", type=float, default=0.05)
+    parser.add_argument("--latency-spread", type=float, default=0.0)
+    parser.add_argument("--http-error-rate", type=float, default=0.0)
+    parser.add_argument("--api-error-rate", type=float, default=0.0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
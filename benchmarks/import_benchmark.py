@@ -0,0 +1,113 @@
+"""Measure the import time of the integration and the modules it adds on top of Home Assistant.
+
+Every run imports the integration in a fresh interpreter, after the Home Assistant modules it builds on are
+already loaded, so only the cost paid by the integration itself is counted. The exit status is non-zero when
+the median import time or the number of added modules is over budget, or when the integration module imports
+a platform.
+
+Run from the repository root, in an environment with Home Assistant installed:
+
+    python -m benchmarks.import_benchmark --runs 5 --budget-ms 100 --max-modules 40
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded by Home Assistant before any integration is set up.
+BASELINE = (
+    "aiohttp",
+    "orjson",
+    "voluptuous",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.const",
+    "homeassistant.exceptions",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.debounce",
+    "homeassistant.helpers.entity",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.entity_registry",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+
+PLATFORMS = ("climate", "sensor", "binary_sensor", "number", "select")
+
+# Loaded by Home Assistant before the platforms of an integration are set up. They are not part of the baseline
+# of the integration module, so pulling a platform onto its import path shows up.
+PLATFORM_BASELINE = BASELINE + tuple("homeassistant.components.%s" % x for x in PLATFORMS)
+
+TARGETS = {
+    "integration": (("custom_components.cosa",), BASELINE),
+    "platforms": (tuple("custom_components.cosa.%s" % x for x in PLATFORMS), PLATFORM_BASELINE),
+    "config_flow": (("custom_components.cosa.config_flow",), BASELINE),
+}
+
+# Modules the integration module must not import, they are loaded with the platforms.
+PLATFORM_MODULES = frozenset(("custom_components.cosa.%s" % x for x in PLATFORMS)) | \
+    frozenset(("homeassistant.components.%s" % x for x in PLATFORMS))
+
+CHILD = """
+import json, sys, time
+for name in {baseline!r}:
+    __import__(name)
+before = set(sys.modules)
+started = time.perf_counter()
+for name in {targets!r}:
+    __import__(name)
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "added": sorted(set(sys.modules) - before)}}))
+"""
+
+
+def measure(targets: tuple[str, ...], baseline: tuple[str, ...]) -> dict:
+    code = CHILD.format(baseline=baseline, targets=targets)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="maximum median import time of the integration module")
+    parser.add_argument("--max-modules", type=int, default=None,
+                        help="maximum number of modules the integration module adds")
+    parser.add_argument("--verbose", action="store_true", help="list the added modules")
+    args = parser.parse_args()
+
+    over_budget = False
+    print("%-12s %10s %10s %10s %12s" % ("import", "median ms", "max ms", "modules", "third party"))
+    for name, (targets, baseline) in TARGETS.items():
+        runs = [measure(targets, baseline) for _ in range(args.runs)]
+        elapsed = [x["elapsed"] * 1000 for x in runs]
+        added = runs[-1]["added"]
+        third_party = [x for x in added if not x.startswith("custom_components")]
+        print("%-12s %10.1f %10.1f %10d %12d" % (
+            name, statistics.median(elapsed), max(elapsed), len(added), len(third_party)))
+        if args.verbose:
+            for module in added:
+                print("    %s" % module)
+
+        if name == "integration":
+            platforms = sorted(PLATFORM_MODULES.intersection(added))
+            if platforms:
+                print("The integration module imports platform modules: %s" % ", ".join(platforms))
+                over_budget = True
+            if args.budget_ms is not None and statistics.median(elapsed) > args.budget_ms:
+                print("Import time over the budget of %.1f ms" % args.budget_ms)
+                over_budget = True
+            if args.max_modules is not None and len(added) > args.max_modules:
+                print("Added modules over the budget of %d" % args.max_modules)
+                over_budget = True
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
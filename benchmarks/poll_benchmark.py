@@ -0,0 +1,167 @@
+"""Measure CosaCoordinator poll cycles against the fake Cosa cloud for growing fleets.
+
+For every fleet size the benchmark reports the poll-cycle latency, the requests per cycle, the entity state
+writes per cycle and the CPU time the coordinator spends per cycle. The fake cloud runs on its own thread,
+so its CPU time is not included.
+
+Run from the repository root, in an environment with Home Assistant installed:
+
+    python -m benchmarks.poll_benchmark --sizes 1 10 50 100 250 500 --cycles 10
+
+Pass `--list-fields id name mode option temperature humidity combiState` to let the fake list carry the live
+fields that bulk polling reads.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.cosa.api import CosaApi
+from custom_components.cosa.binary_sensor import BINARY_SENSOR_TYPES
+from custom_components.cosa.climate import CosaClimateEntity
+from custom_components.cosa.coordinator import CosaCoordinator
+from custom_components.cosa.number import NUMBER_TYPES
+from custom_components.cosa.request_scheduler import RequestScheduler
+from custom_components.cosa.select import NUMBER_TYPES as SELECT_TYPES
+from custom_components.cosa.sensor import SENSOR_TYPES
+from custom_components.cosa.session import ConnectionStats, create_session
+from custom_components.cosa.state import key_fields
+
+from .fake_cosa_server import FakeCosaServer, LatencyProfile
+
+
+def entity_fields() -> list[frozenset[str]]:
+    """The field subscriptions of the entities the platforms create for every endpoint."""
+    fields = [CosaClimateEntity.endpoint_fields]
+    for descriptions in (SENSOR_TYPES, BINARY_SENSOR_TYPES, NUMBER_TYPES, SELECT_TYPES):
+        fields.extend(key_fields(x.key) for x in descriptions)
+    return fields
+
+
+class ServerThread:
+    """Runs the fake cloud on a separate event loop thread."""
+
+    def __init__(self, server: FakeCosaServer):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        return asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+
+    def __exit__(self, *exc_info) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def call(self, func, *args):
+        self.loop.call_soon_threadsafe(func, *args)
+
+    @property
+    def requests(self) -> int:
+        return sum(self.server.requests.copy().values())
+
+
+async def run_fleet(hass: HomeAssistant, size: int, args) -> dict:
+    server = FakeCosaServer(
+        endpoints=size,
+        latency=LatencyProfile(args.latency, args.latency_mean, args.latency_spread),
+        change_rate=args.change_rate,
+        list_fields=tuple(args.list_fields),
+    )
+    interval = timedelta(seconds=args.interval)
+    fields = entity_fields()
+
+    server_thread = ServerThread(server)
+    with server_thread as url:
+        async with create_session(args.concurrency, ConnectionStats()) as session:
+            scheduler = RequestScheduler(max_concurrency=args.concurrency, rate=args.rate, burst=args.concurrency)
+            cosa_api = CosaApi(session, host=url, scheduler=scheduler)
+            await cosa_api.authenticate(server.email, server.password)
+
+            coordinator = CosaCoordinator(hass, cosa_api, "benchmark_%d" % size, min_poll_interval=interval,
+                                          max_poll_interval=interval * 30, bulk_polling=args.bulk_polling)
+            await coordinator.async_refresh()
+            if not coordinator.last_update_success:
+                raise RuntimeError("Initial refresh failed: %s" % coordinator.last_exception)
+
+            state_writes = 0
+
+            def count_write() -> None:
+                nonlocal state_writes
+                state_writes += 1
+
+            for endpoint_id in coordinator.data:
+                for entity in fields:
+                    coordinator.async_add_endpoint_listener(endpoint_id, count_write, entity)
+
+            latencies, requests, writes, cpu = [], [], [], []
+            for _ in range(args.cycles):
+                server_thread.call(server.tick)
+                await asyncio.sleep(args.interval)
+
+                requests_before = server_thread.requests
+                state_writes = 0
+                started, cpu_started = time.perf_counter(), time.thread_time()
+                await coordinator.async_refresh()
+                latencies.append(time.perf_counter() - started)
+                cpu.append(time.thread_time() - cpu_started)
+                requests.append(server_thread.requests - requests_before)
+                writes.append(state_writes)
+
+            await coordinator.async_shutdown()
+
+    return {
+        "size": size,
+        "latency": statistics.mean(latencies),
+        "latency_max": max(latencies),
+        "requests": statistics.mean(requests),
+        "writes": statistics.mean(writes),
+        "cpu": statistics.mean(cpu),
+    }
+
+
+async def main(args) -> None:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        print("%6s %12s %12s %10s %10s %10s" % (
+            "size", "latency ms", "max ms", "requests", "writes", "cpu ms"))
+        try:
+            for size in args.sizes:
+                result = await run_fleet(hass, size, args)
+                print("%6d %12.1f %12.1f %10.1f %10.1f %10.2f" % (
+                    result["size"], result["latency"] * 1000, result["latency_max"] * 1000, result["requests"],
+                    result["writes"], result["cpu"] * 1000))
+        finally:
+            await hass.async_stop(force=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100, 250, 500])
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="minimum poll interval in seconds, the benchmark waits this long between cycles")
+    parser.add_argument("--change-rate", type=float, default=0.1,
+                        help="share of thermostats whose temperature changes between two cycles")
+    parser.add_argument("--list-fields", nargs="+", default=["id", "name"],
+                        help="endpoint fields the fake getEndpoints list returns")
+    parser.add_argument("--no-bulk-polling", dest="bulk_polling", action="store_false")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=1000.0)
+    parser.add_argument("--latency", choices=("constant", "uniform", "lognormal", "exponential"),
+                        default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.05)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
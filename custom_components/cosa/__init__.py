@@ -1,30 +1,80 @@
 """The cosa integration."""
 from __future__ import annotations
 
+from datetime import timedelta
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 from .api import CosaApi
 
-from .const import DOMAIN
+from .const import DOMAIN, CONF_RENEW_TOKEN, CONF_MIN_POLL_INTERVAL, CONF_MAX_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL, \
+    DEFAULT_MAX_POLL_INTERVAL, STORAGE_VERSION, CONF_MAX_CONCURRENT_REQUESTS, CONF_REQUEST_RATE, \
+    DEFAULT_MAX_CONCURRENT_REQUESTS, DEFAULT_REQUEST_RATE, CONF_BULK_POLLING, DEFAULT_BULK_POLLING
 
 # For your initial PR, limit it to 1 platform.
-from .coordinator import CosaCoordinator
+from .coordinator import CosaCoordinator, storage_key
+from .hub import async_get_domain_hub
+from .services import async_setup_services
 
 PLATFORMS: list[Platform] = [Platform.CLIMATE, Platform.SENSOR, Platform.BINARY_SENSOR, Platform.NUMBER,
                              Platform.SELECT]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the services of the cosa integration."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up cosa-thermostat from a config entry."""
 
     hass.data.setdefault(DOMAIN, {})
     auth_token = entry.data["auth_token"]
-    coordinator = CosaCoordinator(hass, CosaApi(async_get_clientsession(hass), auth_token))
+    hub = async_get_domain_hub(hass)
+
+    # Entries talking to the same host share their HTTP session, request scheduler and circuit breaker.
+    max_concurrency = entry.options.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS)
+    scheduler = hub.get_scheduler(
+        CosaApi.HOST,
+        max_concurrency=max_concurrency,
+        rate=entry.options.get(CONF_REQUEST_RATE, DEFAULT_REQUEST_RATE),
+    )
+    cosa_api = CosaApi(hub.get_session(CosaApi.HOST, max_concurrency), auth_token, scheduler=scheduler,
+                       circuit_breaker=hub.get_circuit_breaker(CosaApi.HOST))
+    if entry.data.get(CONF_RENEW_TOKEN):
+        @callback
+        def token_renewed(new_auth_token: str) -> None:
+            hass.config_entries.async_update_entry(entry, data={**entry.data, "auth_token": new_auth_token})
+
+        cosa_api.set_credentials(entry.data["email"], entry.data["password"], token_renewed)
+
+    coordinator = CosaCoordinator(
+        hass,
+        cosa_api,
+        entry.entry_id,
+        min_poll_interval=timedelta(seconds=entry.options.get(CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL)),
+        max_poll_interval=timedelta(seconds=entry.options.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL)),
+        hub=hub,
+        bulk_polling=entry.options.get(CONF_BULK_POLLING, DEFAULT_BULK_POLLING),
+    )
+    coordinator.entry_options = dict(entry.options)
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(hub.async_register(coordinator))
 
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_load_snapshot():
+        # Set up the entities from the persisted snapshot and let the first live refresh run in the background,
+        # so a slow or unreachable cloud does not hold up Home Assistant startup.
+        entry.async_create_background_task(hass, coordinator.async_refresh(), "cosa_first_refresh")
+    else:
+        await coordinator.async_config_entry_first_refresh()
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
@@ -33,6 +83,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
 
     return unload_ok
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
+    if coordinator is not None and coordinator.entry_options == entry.options:
+        # Only the entry data changed, e.g. a renewed auth token.
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted snapshot of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, storage_key(entry.entry_id)).async_remove()
@@ -1,7 +1,8 @@
-from typing import Optional
+import asyncio
+import time
+from typing import Callable, Optional
 
 from .models.auth import AuthRequest
-from .models.base import BaseRequest
 from .models.combi import SetCombiSettingsRequest
 from .models.device import SetDeviceSettingsRequest
 from .models.endpoint import GetEndpointRequest, \
@@ -9,26 +10,61 @@ from .models.endpoint import GetEndpointRequest, \
 from .models.mode import Mode, SetModeRequest
 from .models.option import Option, SetOptionRequest
 from .models.place import GetPlaceRequest
-from .models.settings import CombiSettings
-from .models.temperature import TargetTemperatures, GetTargetTemperaturesRequest, \
-    SetTargetTemperaturesRequest
-from .exceptions import ApiAuthError, InvalidAuth, CannotConnect, ApiError
-import backoff
+from .models.temperature import GetTargetTemperaturesRequest, SetTargetTemperaturesRequest
+from .codec import dumps, encode, loads
+from .state import EndpointState
+from .request_scheduler import Priority, RequestScheduler
+from .latency import LatencyPolicy
+from .metrics import ApiMetrics
+from .exceptions import ApiAuthError, InvalidAuth, CannotConnect, ApiError, EndpointNotFound
+from .retry import CircuitBreaker, RetryPolicy, is_transient
 
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientTimeout
+
+
+EMPTY_BODY = dumps({})
 
 
 class CosaApi:
     HOST = "https://kiwi.cosa.com.tr"
+    # Longest deadline of a single request once it got its slot, so a slow endpoint cannot hold up a whole poll
+    # cycle. Paths with enough samples get a deadline from their observed latency.
+    REQUEST_TIMEOUT = 10
+    # Idempotent reads that are duplicated when the first request is slower than the path's 95th percentile.
+    HEDGED_PATHS = frozenset(("api/endpoints/getEndpoint", "api/endpoints/getEndpoints"))
+    # Error code of a request for an endpoint that is not on the account, e.g. one that was deleted.
+    ERROR_ENDPOINT_NOT_FOUND = 404
 
-    def __init__(self, session: ClientSession, auth_token: Optional[str] = None, verbose: bool = False) -> None:
+    def __init__(self, session: ClientSession, auth_token: Optional[str] = None, verbose: bool = False,
+                 scheduler: Optional[RequestScheduler] = None, retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, host: Optional[str] = None,
+                 hedge_requests: bool = True) -> None:
         self.session = session
+        self.host = host or self.HOST
         self.auth_token = auth_token
         self.verbose = verbose
+        self.scheduler = scheduler or RequestScheduler()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(self.host)
+        self.metrics = ApiMetrics()
+        self.latency_policy = LatencyPolicy(self.metrics, self.REQUEST_TIMEOUT)
+        self.hedge_requests = hedge_requests
+
+        self.token_renewals = 0
+        self._credentials: Optional[tuple[str, str]] = None
+        self._on_token_renewed: Optional[Callable[[str], None]] = None
+        self._renewal: Optional[asyncio.Task] = None
+
+    def set_credentials(self, email: str, password: str,
+                        on_token_renewed: Optional[Callable[[str], None]] = None) -> None:
+        """Renew the auth token with the given credentials once it expires."""
+        self._credentials = (email, password)
+        self._on_token_renewed = on_token_renewed
 
     async def authenticate(self, email: str, password: str) -> str:
-        dto = AuthRequest(email=email, password=password)
-        result = await self._cosa_request("api/users/login", dto=dto, auth=False)
+        body = encode(AuthRequest, email=email, password=password)
+        result = await self._cosa_request("api/users/login", body=body, auth=False,
+                                          priority=Priority.INTERACTIVE)
 
         self.auth_token = result["authToken"]
         return result["authToken"]
@@ -42,84 +78,214 @@ class CosaApi:
         return result["endpoints"]
 
     async def get_endpoint_info(self, endpoint_id: str):
-        dto = GetEndpointRequest(endpoint=endpoint_id)
-        result = await self._cosa_request("api/endpoints/getEndpoint", dto=dto)
-        return result["endpoint"]
+        body = encode(GetEndpointRequest, endpoint=endpoint_id)
+        try:
+            result = await self._cosa_request("api/endpoints/getEndpoint", body=body)
+        except EndpointNotFound:
+            raise
+        except ApiError as err:
+            # Responses without the error code are matched on the exact message of the error instead.
+            if err.code == self.ERROR_ENDPOINT_NOT_FOUND or (err.code is None and str(err) == "Endpoint not found"):
+                raise EndpointNotFound(endpoint_id) from err
+            raise
+        endpoint = result.get("endpoint")
+        if not endpoint or endpoint.get("id") != endpoint_id:
+            raise EndpointNotFound(endpoint_id)
+        return endpoint
 
     async def get_endpoint_clients(self, endpoint_id: str):
-        dto = GetEndpointClientsRequest(endpoint=endpoint_id)
-        result = await self._cosa_request("api/endpointClients/getEndpointClients", dto=dto)
+        body = encode(GetEndpointClientsRequest, endpoint=endpoint_id)
+        result = await self._cosa_request("api/endpointClients/getEndpointClients", body=body)
         return result["endpointClients"]
 
     async def get_place(self, place_id: str):
-        dto = GetPlaceRequest(place=place_id)
-        result = await self._cosa_request("api/places/getPlace", dto=dto)
+        body = encode(GetPlaceRequest, place=place_id)
+        result = await self._cosa_request("api/places/getPlace", body=body)
         return result["place"]
 
     async def get_target_temperatures(self, endpoint_id: str):
-        dto = GetTargetTemperaturesRequest(endpoint=endpoint_id)
-        result = await self._cosa_request("api/endpoints/getTargetTemperatures", dto=dto)
+        body = encode(GetTargetTemperaturesRequest, endpoint=endpoint_id)
+        result = await self._cosa_request("api/endpoints/getTargetTemperatures", body=body)
         return result["targetTemperatures"]
 
-    async def set_target_temperatures(self, endpoint, away_temp: Optional[float] = None,
+    async def set_target_temperatures(self, endpoint: EndpointState, away_temp: Optional[float] = None,
                                       custom_temp: Optional[float] = None, home_temp: Optional[float] = None,
                                       sleep_temp: Optional[float] = None) -> bool:
         if away_temp is None:
-            away_temp = endpoint["awayTemperature"]
+            away_temp = endpoint.awayTemperature
         if custom_temp is None:
-            custom_temp = endpoint["customTemperature"]
+            custom_temp = endpoint.customTemperature
         if home_temp is None:
-            home_temp = endpoint["homeTemperature"]
+            home_temp = endpoint.homeTemperature
         if sleep_temp is None:
-            sleep_temp = endpoint["sleepTemperature"]
+            sleep_temp = endpoint.sleepTemperature
 
-        dto = SetTargetTemperaturesRequest(
-            endpoint=endpoint["id"],
-            targetTemperatures=TargetTemperatures(
+        body = encode(
+            SetTargetTemperaturesRequest,
+            endpoint=endpoint.id,
+            targetTemperatures=dict(
                 away=away_temp,
                 custom=custom_temp,
                 home=home_temp,
                 sleep=sleep_temp
             )
         )
-        result = await self._cosa_request("api/endpoints/setTargetTemperatures", dto=dto)
+        result = await self._cosa_request("api/endpoints/setTargetTemperatures", body=body,
+                                          priority=Priority.INTERACTIVE)
         return result.get("ok") == 1
 
     async def set_option(self, endpoint_id: str, option: Option) -> bool:
-        dto = SetOptionRequest(endpoint=endpoint_id, option=option)
-        result = await self._cosa_request("api/endpoints/setOption", dto=dto)
+        body = encode(SetOptionRequest, endpoint=endpoint_id, option=option)
+        result = await self._cosa_request("api/endpoints/setOption", body=body,
+                                          priority=Priority.INTERACTIVE)
         return result.get("ok") == 1
 
     async def set_mode(self, endpoint_id: str, mode: Mode, option: Option) -> bool:
-        dto = SetModeRequest(endpoint=endpoint_id, mode=mode, option=option)
-        result = await self._cosa_request("api/endpoints/setMode", dto=dto)
+        body = encode(SetModeRequest, endpoint=endpoint_id, mode=mode, option=option)
+        result = await self._cosa_request("api/endpoints/setMode", body=body)
         return result.get("ok") == 1
 
-    async def set_combi_settings(self, endpoint, pid_window_low: Optional[float] = None,
+    async def set_combi_settings(self, endpoint: EndpointState, pid_window_low: Optional[float] = None,
                                  pid_window_high: Optional[float] = None) -> bool:
         if pid_window_low is None:
-            pid_window_low = endpoint["combiSettings"]["pidWindowLow"]
+            pid_window_low = endpoint.pidWindowLow
         if pid_window_high is None:
-            pid_window_high = endpoint["combiSettings"]["pidWindowHigh"]
+            pid_window_high = endpoint.pidWindowHigh
 
-        dto = SetCombiSettingsRequest(
-            endpoint=endpoint["id"],
-            combiSettings=CombiSettings(
+        body = encode(
+            SetCombiSettingsRequest,
+            endpoint=endpoint.id,
+            combiSettings=dict(
                 heating=True,
                 pidWindowLow=pid_window_low,
                 pidWindowHigh=pid_window_high
             )
         )
-        result = await self._cosa_request("api/endpoints/setCombiSettings", dto=dto)
+        result = await self._cosa_request("api/endpoints/setCombiSettings", body=body,
+                                          priority=Priority.INTERACTIVE)
         return result.get("ok") == 1
 
     async def set_device_settings(self, endpoint_id: str, calibration: float) -> bool:
-        dto = SetDeviceSettingsRequest(endpoint=endpoint_id, calibration=calibration)
-        result = await self._cosa_request("api/endpoints/setDeviceSettings", dto=dto)
+        body = encode(SetDeviceSettingsRequest, endpoint=endpoint_id, calibration=calibration)
+        result = await self._cosa_request("api/endpoints/setDeviceSettings", body=body,
+                                          priority=Priority.INTERACTIVE)
         return result.get("ok") == 1
 
-    @backoff.on_exception(backoff.expo, Exception, max_time=2, max_tries=3)
-    async def _cosa_request(self, path: str, dto: BaseRequest = BaseRequest(), auth=True):
+    async def _cosa_request(self, path: str, body: bytes = EMPTY_BODY, auth=True,
+                            priority: Priority = Priority.POLL):
+        metrics = self.metrics.path(path)
+        metrics.requests += 1
+        try:
+            return await self._cosa_request_with_renewal(path, body, auth, priority)
+        except Exception as err:
+            metrics.errors[type(err).__name__] += 1
+            raise
+
+    async def _cosa_request_with_renewal(self, path: str, body: bytes, auth: bool, priority: Priority):
+        auth_token = self.auth_token
+        try:
+            return await self._cosa_request_with_retry(path, body, auth, priority)
+        except ApiAuthError:
+            if not auth or self._credentials is None:
+                raise
+
+        # The token expired, renew it once and replay the request.
+        await self._async_renew_token(auth_token)
+        return await self._cosa_request_with_retry(path, body, auth, priority)
+
+    async def _async_renew_token(self, expired_token: Optional[str]) -> None:
+        """Log in again, sharing a single login between all requests that failed with the expired token."""
+        if self.auth_token != expired_token:
+            # Another request already renewed the token.
+            return
+
+        if self._renewal is None:
+            self._renewal = asyncio.get_running_loop().create_task(self._async_login())
+        renewal = self._renewal
+        try:
+            await asyncio.shield(renewal)
+        finally:
+            if renewal.done() and self._renewal is renewal:
+                self._renewal = None
+
+    async def _async_login(self) -> None:
+        email, password = self._credentials
+        auth_token = await self.authenticate(email, password)
+        self.token_renewals += 1
+        if self._on_token_renewed is not None:
+            self._on_token_renewed(auth_token)
+
+    async def _cosa_request_with_retry(self, path: str, body: bytes, auth: bool, priority: Priority):
+        tries = 0
+        while True:
+            tries += 1
+            self.circuit_breaker.before_request()
+            try:
+                if self.hedge_requests and path in self.HEDGED_PATHS:
+                    result = await self._cosa_request_hedged(path, body, auth, priority, tries)
+                else:
+                    result = await self._cosa_request_once(path, body, auth, priority, attempt=tries)
+            except asyncio.CancelledError:
+                if self.circuit_breaker.state == CircuitBreaker.HALF_OPEN:
+                    self.circuit_breaker.record_failure()
+                raise
+            except Exception as err:
+                if not is_transient(err):
+                    # The API answered, so the host itself is reachable.
+                    self.circuit_breaker.record_success()
+                    raise
+
+                self.circuit_breaker.record_failure()
+                if not self.retry_policy.should_retry(err, tries):
+                    raise
+                self.metrics.path(path).retries += 1
+                await asyncio.sleep(self.retry_policy.delay(tries))
+            else:
+                self.circuit_breaker.record_success()
+                return result
+
+    async def _cosa_request_hedged(self, path: str, body: bytes, auth: bool, priority: Priority, attempt: int = 1):
+        """Send a duplicate request when the first one is slower than usual and use the first response."""
+        delay = self.latency_policy.hedge_delay(path)
+        if delay is None:
+            return await self._cosa_request_once(path, body, auth, priority, attempt=attempt)
+
+        loop = asyncio.get_running_loop()
+        sent = asyncio.Event()
+        primary = loop.create_task(self._cosa_request_once(path, body, auth, priority, sent, attempt))
+        waiter = loop.create_task(sent.wait())
+        pending = {primary}
+        try:
+            # The hedge delay starts once the request got its slot, queueing is not a slow response.
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            # A duplicate would only queue up behind requests that wait for a slot.
+            if not done and not self.scheduler.queue_depth:
+                self.metrics.path(path).hedges += 1
+                pending.add(loop.create_task(self._cosa_request_once(path, body, auth, priority, attempt=attempt)))
+
+            error = None
+            while True:
+                # Retrieve the exception of every finished request, so none of them is reported as unhandled.
+                failed = [x for x in done if x.exception() is not None]
+                for task in done:
+                    if task not in failed:
+                        if task is not primary:
+                            self.metrics.path(path).hedge_wins += 1
+                        return task.result()
+                if failed:
+                    error = error or failed[0].exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+            for task in pending:
+                task.cancel()
+
+    async def _cosa_request_once(self, path: str, body: bytes, auth: bool, priority: Priority,
+                                 sent: Optional[asyncio.Event] = None, attempt: int = 1):
         headers = {
             "accept": "application/json, text/plain, */*",
             "content-type": "application/json;charset=utf-8"
@@ -127,11 +293,28 @@ class CosaApi:
         if auth:
             headers["authToken"] = self.auth_token
 
-        async with self.session.post("%s/%s" % (self.HOST, path), headers=headers, json=dto.dict()) as response:
-            if not response or response.status < 200 or response.status >= 400:
-                raise CannotConnect
+        async with self.scheduler.slot(priority):
+            if sent is not None:
+                sent.set()
+            timeout = ClientTimeout(total=self.latency_policy.deadline(path, attempt))
+            started = time.monotonic()
+            cancelled = False
+            try:
+                async with self.session.post("%s/%s" % (self.host, path), headers=headers, data=body,
+                                             timeout=timeout) as response:
+                    if not response or response.status < 200 or response.status >= 400:
+                        raise CannotConnect
+
+                    result = await response.json(loads=loads)
+            except asyncio.CancelledError:
+                # E.g. the request lost a hedge race, its latency is unknown.
+                cancelled = True
+                raise
+            finally:
+                # Measured inside the scheduler slot, so only the time spent on the cloud is recorded.
+                if not cancelled:
+                    self.metrics.path(path).latency.observe(time.monotonic() - started)
 
-            result = await response.json()
             if self.verbose:
                 print(result)
 
@@ -142,7 +325,7 @@ class CosaApi:
                     raise ApiAuthError
                 error = result.get("error")
                 if error:
-                    raise ApiError(error[0]["message"])
-                raise ApiError("Something went wrong")
+                    raise ApiError(error[0]["message"], code=result.get("code"))
+                raise ApiError("Something went wrong", code=result.get("code"))
 
             return result
@@ -7,9 +7,8 @@ from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySen
 from homeassistant.core import callback
 
 from .const import DOMAIN
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity
-)
+from .entity import CosaEntity, async_add_endpoint_entities
+from .state import compile_accessor, key_fields
 from .models.option import Option
 
 
@@ -64,39 +63,33 @@ async def async_setup_entry(hass, entry, async_add_entities):
     # assuming API object stored here by __init__.py
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    entities = [
-        CosaBinarySensorEntity(coordinator, idx, entity_description, entity_id)
-        for idx, ent in enumerate(coordinator.data)
-        for entity_id, entity_description in enumerate(BINARY_SENSOR_TYPES)
-    ]
+    def create_entities(endpoint_id: str) -> list[CosaBinarySensorEntity]:
+        return [
+            CosaBinarySensorEntity(coordinator, endpoint_id, entity_description, entity_id)
+            for entity_id, entity_description in enumerate(BINARY_SENSOR_TYPES)
+        ]
 
-    async_add_entities(entities)
+    async_add_endpoint_entities(entry, coordinator, async_add_entities, create_entities)
 
 
-class CosaBinarySensorEntity(CoordinatorEntity, BinarySensorEntity):
-    def __init__(self, coordinator: CosaCoordinator, idx: int, entity_description: CosaBinarySensorEntityDescription,
-                 entity_id: int):
-        super().__init__(coordinator)
-        self.idx = idx
+class CosaBinarySensorEntity(CosaEntity, BinarySensorEntity):
+    def __init__(self, coordinator: CosaCoordinator, endpoint_id: str,
+                 entity_description: CosaBinarySensorEntityDescription, entity_id: int):
+        super().__init__(coordinator, endpoint_id)
         self.entity_description: CosaBinarySensorEntityDescription = entity_description
 
+        self.endpoint_fields = key_fields(entity_description.key)
+        self._value = compile_accessor(entity_description.key)
+
         self.entity_id = "binary_sensor.cosa_%s_%s_%s" % (
-            entity_description.key, coordinator.data[idx]["name"].lower(), entity_id)
+            entity_description.key, self.endpoint.name.lower(), entity_id)
         self._attr_unique_id = "binary_sensor.cosa_%s_%s_%s" % (
-            entity_description.key, coordinator.data[idx]["id"], entity_id)
+            entity_description.key, endpoint_id, entity_id)
 
-        self._update_attrs(self.coordinator.data[self.idx])
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        self._update_attrs(self.coordinator.data[self.idx])
-        self.async_write_ha_state()
+        self._update_attrs(self.endpoint)
 
     @callback
     def _update_attrs(self, endpoint) -> None:
-        keys = self.entity_description.key.split("|")
-        attr = endpoint
-        for key in keys:
-            attr = attr[key]
+        attr = self._value(endpoint)
 
         self._attr_is_on = attr == self.entity_description.condition
@@ -0,0 +1,95 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from .state import EndpointState
+
+_LOGGER = logging.getLogger(__name__)
+
+# The fields that have to be in the getEndpoints list for it to replace the per-endpoint polls.
+LIVE_FIELDS = frozenset(("temperature", "humidity", "combiState", "option", "mode"))
+
+
+class BulkListPoller:
+    """Reads the live endpoint fields from the getEndpoints list, a single request per cycle for the whole account.
+
+    Which fields the list carries is probed from the first list response. An endpoint is only fetched with
+    getEndpoint when it is new, when its list entry changed while the list lacks some of its fields, or when its
+    full state is older than `full_refresh_interval`.
+    """
+
+    def __init__(self, full_refresh_interval: timedelta):
+        self.full_refresh_interval = full_refresh_interval.total_seconds()
+        self.list_fields: Optional[frozenset[str]] = None
+
+        self.cycles = 0
+        self.full_fetches = 0
+
+        self._fetched_at: dict[str, float] = {}
+
+    @property
+    def available(self) -> bool:
+        return self.list_fields is not None and LIVE_FIELDS <= self.list_fields
+
+    def probe(self, endpoints: list[dict]) -> bool:
+        """Record the fields the list returns for every endpoint, return whether bulk polling is possible."""
+        if self.list_fields is None and endpoints:
+            self.list_fields = frozenset.intersection(*(EndpointState.payload_fields(x) for x in endpoints))
+            if self.available:
+                _LOGGER.debug("Polling the endpoint list, it carries %s", ", ".join(sorted(self.list_fields)))
+            else:
+                _LOGGER.debug("The endpoint list lacks %s, polling every endpoint",
+                              ", ".join(sorted(LIVE_FIELDS - self.list_fields)))
+        return self.available
+
+    def merge(self, endpoints: list[dict], previous: dict[str, EndpointState],
+              now: Optional[float] = None) -> tuple[dict[str, EndpointState], list[str]]:
+        """Apply the list entries to the previous states.
+
+        Returns the merged states of the known endpoints and the ids of the endpoints that need a full fetch.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        self.cycles += 1
+        complete = self.list_fields >= frozenset(EndpointState.__slots__)
+        states, fetch = {}, []
+        for entry in endpoints:
+            endpoint_id = entry["id"]
+            state = previous.get(endpoint_id)
+            if state is None:
+                fetch.append(endpoint_id)
+                continue
+
+            listed = EndpointState.from_payload(entry)
+            merged = state.replace(**{name: getattr(listed, name) for name in self.list_fields})
+            states[endpoint_id] = merged if merged.diff(state) else state
+            if complete:
+                continue
+            fetched_at = self._fetched_at.get(endpoint_id)
+            if states[endpoint_id] is not state or fetched_at is None or \
+                    now - fetched_at >= self.full_refresh_interval:
+                fetch.append(endpoint_id)
+        return states, fetch
+
+    def mark_fetched(self, endpoint_ids: Iterable[str], now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        for endpoint_id in endpoint_ids:
+            self.full_fetches += 1
+            self._fetched_at[endpoint_id] = now
+
+    def retain(self, endpoint_ids: Iterable[str]) -> None:
+        keep = set(endpoint_ids)
+        for endpoint_id in list(self._fetched_at):
+            if endpoint_id not in keep:
+                del self._fetched_at[endpoint_id]
+
+    def as_dict(self) -> dict:
+        return {
+            "available": self.available,
+            "list_fields": sorted(self.list_fields) if self.list_fields is not None else None,
+            "cycles": self.cycles,
+            "full_fetches": self.full_fetches,
+        }
@@ -1,34 +1,34 @@
 from .coordinator import CosaCoordinator
 from .models.option import Option
+from .presets import PRESETS, preset_changes, setpoint_changes
+from .writes import WriteKind
 from homeassistant.components.climate import ClimateEntity, HVACMode, ClimateEntityFeature, UnitOfTemperature
 from homeassistant.const import PRECISION_TENTHS
 from homeassistant.core import callback
 import logging
 
 from .const import DOMAIN, MIN_TEMPERATURE, MAX_TEMPERATURE
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
+from .entity import CosaEntity, async_add_endpoint_entities
+from .metadata import METADATA_FIELD
 
 _LOGGER = logging.getLogger(__name__)
 
-
 async def async_setup_entry(hass, entry, async_add_entities):
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    async_add_entities(
-        [CosaClimateEntity(coordinator, idx) for idx, ent in enumerate(coordinator.data)], True
+    async_add_endpoint_entities(
+        entry, coordinator, async_add_entities, lambda endpoint_id: [CosaClimateEntity(coordinator, endpoint_id)], True
     )
 
 
-class CosaClimateEntity(CoordinatorEntity, ClimateEntity):
+class CosaClimateEntity(CosaEntity, ClimateEntity):
+    endpoint_fields = frozenset(("name", "temperature", "targetTemperature", "option", METADATA_FIELD))
 
-    def __init__(self, coordinator: CosaCoordinator, idx: int):
-        super().__init__(coordinator)
-        self.idx = idx
+    def __init__(self, coordinator: CosaCoordinator, endpoint_id: str):
+        super().__init__(coordinator, endpoint_id)
 
-        self.entity_id = "climate.cosa_%s" % coordinator.data[idx]["name"].lower()
-        self._attr_unique_id = "climate.cosa_%s" % coordinator.data[idx]["id"]
+        self.entity_id = "climate.cosa_%s" % self.endpoint.name.lower()
+        self._attr_unique_id = "climate.cosa_%s" % endpoint_id
         self._attr_target_temperature_step = PRECISION_TENTHS
         self._attr_precision = PRECISION_TENTHS
         self._attr_min_temp = MIN_TEMPERATURE
@@ -36,92 +36,63 @@ class CosaClimateEntity(CoordinatorEntity, ClimateEntity):
         self._attr_temperature_unit = UnitOfTemperature.CELSIUS
         self._attr_supported_features = ClimateEntityFeature.TARGET_TEMPERATURE | ClimateEntityFeature.PRESET_MODE | ClimateEntityFeature.TURN_ON | ClimateEntityFeature.TURN_OFF
         self._enable_turn_on_off_backwards_compatibility = False
-        self._attr_preset_modes = list(
-            map(str.capitalize, [Option.HOME, Option.AWAY, Option.SLEEP, Option.CUSTOM, Option.OFF]))
+        self._attr_preset_modes = list(map(str.capitalize, PRESETS))
         self._attr_hvac_modes = [HVACMode.HEAT, HVACMode.OFF]
 
-        self._update_attr(self.coordinator.data[self.idx])
+        self._update_attrs(self.endpoint)
 
     async def async_set_temperature(self, **kwargs) -> None:
         temperature = kwargs.get("temperature")
         if temperature is None:
             return
 
-        def pre_update_data(attr):
-            self.coordinator.data[self.idx][attr] = temperature
-            self.coordinator.async_set_updated_data(self.coordinator.data)
-
-        endpoint = self.coordinator.data[self.idx]
-        if endpoint["option"] == Option.HOME:
-            pre_update_data("homeTemperature")
-            await self.coordinator.cosa_api.set_target_temperatures(endpoint, home_temp=temperature)
-        elif endpoint["option"] == Option.SLEEP:
-            pre_update_data("sleepTemperature")
-            await self.coordinator.cosa_api.set_target_temperatures(endpoint, sleep_temp=temperature)
-        elif endpoint["option"] == Option.AWAY:
-            pre_update_data("awayTemperature")
-            await self.coordinator.cosa_api.set_target_temperatures(endpoint, away_temp=temperature)
-        elif endpoint["option"] == Option.CUSTOM:
-            pre_update_data("customTemperature")
-            await self.coordinator.cosa_api.set_target_temperatures(endpoint, custom_temp=temperature)
-        else:
+        changes = setpoint_changes(self.endpoint, temperature)
+        if changes is None:
             return
-
-        await self.coordinator.async_request_refresh()
+        # The displayed setpoint is kept over lagging polls along with the preset's own field.
+        state_changes, write_fields = changes
+        self.coordinator.async_update_endpoint(self.endpoint_id, **state_changes)
+        self.coordinator.writes.async_queue(self.endpoint_id, WriteKind.TARGET_TEMPERATURES, **write_fields)
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
-        endpoint = self.coordinator.data[self.idx]
+        endpoint = self.endpoint
 
         if hvac_mode == HVACMode.HEAT:
-            option = endpoint["previousOption"]
+            option = endpoint.previousOption
         else:
             option = Option.OFF
 
         await self.async_set_preset_mode(option)
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
-        endpoint = self.coordinator.data[self.idx]
-        preset_mode = preset_mode.lower()
-        if preset_mode == Option.OFF:
-            preset_mode = Option.FROZEN
-            target_temp = MIN_TEMPERATURE
-        elif preset_mode == Option.HOME:
-            target_temp = endpoint["homeTemperature"]
-        elif preset_mode == Option.SLEEP:
-            target_temp = endpoint["sleepTemperature"]
-        elif preset_mode == Option.AWAY:
-            target_temp = endpoint["awayTemperature"]
-        else:
-            target_temp = endpoint["customTemperature"]
-
-        self.coordinator.data[self.idx]["option"] = preset_mode
-        self.coordinator.data[self.idx]["target_temperature"] = target_temp
-        self.coordinator.async_set_updated_data(self.coordinator.data)
-        await self.coordinator.cosa_api.set_option(endpoint["id"], Option(preset_mode))
-        await self.coordinator.async_request_refresh()
+        changes = preset_changes(self.endpoint, preset_mode)
+        self.coordinator.async_update_endpoint(self.endpoint_id, **changes)
+        self.coordinator.writes.async_queue(self.endpoint_id, WriteKind.OPTION, option=Option(changes["option"]))
 
     async def async_turn_on(self):
-        endpoint = self.coordinator.data[self.idx]
-        await self.async_set_preset_mode(endpoint["previousOption"])
+        endpoint = self.endpoint
+        await self.async_set_preset_mode(endpoint.previousOption)
 
     async def async_turn_off(self):
         await self.async_set_preset_mode(Option.OFF)
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        self._update_attr(self.coordinator.data[self.idx])
-
-        self.async_write_ha_state()
-
-    @callback
-    def _update_attr(self, endpoint):
-        self._attr_name = endpoint["name"]
-        self._attr_current_temperature = endpoint["temperature"]
-        self._attr_target_temperature = endpoint["targetTemperature"]
+    def _update_attrs(self, endpoint) -> None:
+        self._attr_name = endpoint.name
+        self._attr_current_temperature = endpoint.temperature
+        self._attr_target_temperature = endpoint.targetTemperature
 
-        if endpoint["option"] == Option.FROZEN:
+        if endpoint.option == Option.FROZEN:
             self._attr_hvac_mode = HVACMode.OFF
             self._attr_preset_mode = Option.OFF.capitalize()
         else:
             self._attr_hvac_mode = HVACMode.HEAT
-            self._attr_preset_mode = endpoint["option"].capitalize()
+            self._attr_preset_mode = endpoint.option.capitalize()
+
+    @property
+    def extra_state_attributes(self):
+        attributes = self.coordinator.endpoint_metadata(self.endpoint_id)
+        stale = super().extra_state_attributes
+        if stale:
+            attributes.update(stale)
+        return attributes or None
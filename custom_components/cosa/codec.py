@@ -0,0 +1,72 @@
+import json
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable
+
+from .models.base import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+SERIALIZER = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+
+def _compile_converter(annotation: Any) -> Callable[[Any], Any] | None:
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            encoder = compile_encoder(annotation)
+            return lambda value: encoder(**value)
+        if issubclass(annotation, Enum):
+            return annotation
+        if annotation in (str, float, int, bool):
+            return annotation
+    return None
+
+
+class RequestEncoder:
+    """Builds the JSON body of a request model straight from keyword arguments.
+
+    Field converters are resolved once from the model annotations, so encoding does not build a model instance
+    nor go through `.dict()`.
+    """
+
+    __slots__ = ("model", "_fields")
+
+    def __init__(self, model: type):
+        self.model = model
+        self._fields = tuple(
+            (name, _compile_converter(annotation)) for name, annotation in model.model_fields().items()
+        )
+
+    def __call__(self, **values: Any) -> dict:
+        body = {}
+        for name, convert in self._fields:
+            try:
+                value = values[name]
+            except KeyError:
+                raise TypeError("%s is missing the field %s" % (self.model.__name__, name)) from None
+            body[name] = convert(value) if convert is not None and value is not None else value
+        return body
+
+
+@lru_cache(maxsize=None)
+def compile_encoder(model: type) -> RequestEncoder:
+    return RequestEncoder(model)
+
+
+def encode(model: type, **values: Any) -> bytes:
+    return dumps(compile_encoder(model)(**values))
@@ -7,13 +7,15 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .api import CosaApi
 
-from .const import DOMAIN
+from .const import DOMAIN, CONF_RENEW_TOKEN, CONF_MIN_POLL_INTERVAL, CONF_MAX_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL, \
+    DEFAULT_MAX_POLL_INTERVAL, CONF_MAX_CONCURRENT_REQUESTS, CONF_REQUEST_RATE, DEFAULT_MAX_CONCURRENT_REQUESTS, \
+    DEFAULT_REQUEST_RATE, CONF_BULK_POLLING, DEFAULT_BULK_POLLING
 from .exceptions import InvalidAuth, CannotConnect
+from .hub import async_get_domain_hub
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +23,7 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required("email"): str,
         vol.Required("password"): str,
+        vol.Optional(CONF_RENEW_TOKEN, default=False): bool,
     }
 )
 
@@ -38,13 +41,19 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    hub = CosaHub(async_get_clientsession(hass))
+    # Log in through the session the entry will use, so its connection to the cloud is already warm.
+    session = async_get_domain_hub(hass).get_session(CosaApi.HOST, DEFAULT_MAX_CONCURRENT_REQUESTS)
+    hub = CosaHub(session)
 
     auth_token = await hub.authenticate(data["email"], data["password"])
     if not auth_token:
         raise InvalidAuth
 
     # Return info that you want to store in the config entry.
+    if data.get(CONF_RENEW_TOKEN):
+        # The credentials are only stored if the user opted in to renewing the token automatically.
+        return {"title": "Cosa", "auth_token": auth_token, CONF_RENEW_TOKEN: True, "email": data["email"],
+                "password": data["password"]}
     return {"title": "Cosa", "auth_token": auth_token}
 
 
@@ -53,6 +62,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
             self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -79,3 +93,49 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the polling and request options for Cosa."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(
+            self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors = {}
+
+        if user_input is not None:
+            if user_input[CONF_MIN_POLL_INTERVAL] > user_input[CONF_MAX_POLL_INTERVAL]:
+                errors["base"] = "invalid_poll_interval"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MIN_POLL_INTERVAL,
+                    default=options.get(CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                vol.Required(
+                    CONF_MAX_POLL_INTERVAL,
+                    default=options.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                vol.Required(
+                    CONF_MAX_CONCURRENT_REQUESTS,
+                    default=options.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+                vol.Required(
+                    CONF_REQUEST_RATE,
+                    default=options.get(CONF_REQUEST_RATE, DEFAULT_REQUEST_RATE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=100)),
+                vol.Required(
+                    CONF_BULK_POLLING,
+                    default=options.get(CONF_BULK_POLLING, DEFAULT_BULK_POLLING),
+                ): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
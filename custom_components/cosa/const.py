@@ -1,6 +1,23 @@
 """Constants for the Cosa integration."""
 
 DOMAIN = "cosa"
+DATA_HUB = "cosa_hub"
 
 MIN_TEMPERATURE = 5
 MAX_TEMPERATURE = 32
+
+CONF_RENEW_TOKEN = "renew_token"
+CONF_MIN_POLL_INTERVAL = "min_poll_interval"
+CONF_MAX_POLL_INTERVAL = "max_poll_interval"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_REQUEST_RATE = "request_rate"
+CONF_BULK_POLLING = "bulk_polling"
+
+DEFAULT_MIN_POLL_INTERVAL = 10
+DEFAULT_MAX_POLL_INTERVAL = 300
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_REQUEST_RATE = 5
+DEFAULT_BULK_POLLING = True
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60
@@ -1,35 +1,294 @@
 import asyncio
 import logging
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
 
-from .const import DOMAIN
+from .const import DOMAIN, DEFAULT_MIN_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL, STORAGE_VERSION, \
+    STORAGE_SAVE_DELAY
 from .api import CosaApi
-from .exceptions import ApiAuthError, ApiError
-from .models.mode import Mode
-from homeassistant.core import HomeAssistant
+from .bulk import BulkListPoller
+from .discovery import EndpointDiscovery
+from .enforcement import ModeEnforcer
+from .hub import CosaDomainHub
+from .metrics import LatencyHistogram
+from .history import EndpointHistory
+from .metadata import METADATA_FIELD, MetadataCache, MetadataKind
+from .exceptions import ApiAuthError, ApiError, CannotConnect, CircuitOpen, EndpointNotFound, InvalidAuth
+from .polling import AdaptivePollScheduler
+from .state import EndpointState
+from .writes import WriteCoalescer
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 import async_timeout
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def storage_key(entry_id: str) -> str:
+    return "%s.%s" % (DOMAIN, entry_id)
+
+
+class _EndpointFailure:
+    __slots__ = ("since", "count", "error")
+
+    def __init__(self, since: datetime):
+        self.since = since
+        self.count = 0
+        self.error = None
+
+    def as_dict(self) -> dict:
+        return {"since": self.since.isoformat(), "count": self.count, "error": self.error}
+
+
 class CosaCoordinator(DataUpdateCoordinator):
-    UPDATE_DATA_INTERVAL = timedelta(seconds=10)
     UPDATE_ENDPOINTS_INTERVAL = timedelta(hours=1)
+    HISTORY_WINDOW = timedelta(hours=1)
+    LIST_TIMEOUT = 15
+    # Consecutive failed polls after which the entities of an endpoint become unavailable.
+    MAX_ENDPOINT_FAILURES = 3
+    # How long an optimistic value is kept over polled data that does not reflect the write yet.
+    OVERLAY_TIMEOUT = 30
 
-    def __init__(self, hass: HomeAssistant, cosa_api: CosaApi):
+    def __init__(self, hass: HomeAssistant, cosa_api: CosaApi, entry_id: str,
+                 min_poll_interval: timedelta = timedelta(seconds=DEFAULT_MIN_POLL_INTERVAL),
+                 max_poll_interval: timedelta = timedelta(seconds=DEFAULT_MAX_POLL_INTERVAL),
+                 hub: CosaDomainHub | None = None, bulk_polling: bool = True):
         """Initialize my coordinator."""
+        # The coordinator ticks at the shortest poll interval, the scheduler decides which endpoints are polled.
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=self.UPDATE_DATA_INTERVAL,
+            update_interval=min_poll_interval,
         )
 
-        self._update_endpoint_counter = 0
-        self._endpoints = []
         self.cosa_api = cosa_api
+        self.entry_id = entry_id
+        self.hub = hub
+        self.min_poll_interval = min_poll_interval
+        self.discovery = EndpointDiscovery(cosa_api, self.UPDATE_ENDPOINTS_INTERVAL)
+        self.scheduler = AdaptivePollScheduler(min_poll_interval, max_poll_interval)
+        self.bulk = BulkListPoller(max_poll_interval) if bulk_polling else None
+        self.writes = WriteCoalescer(hass, self)
+        self.enforcer = ModeEnforcer(hass, cosa_api)
+        self.metadata = MetadataCache(hass, cosa_api, self._async_metadata_updated)
+        self._endpoint_listeners: dict[str, list[tuple[CALLBACK_TYPE, frozenset[str] | None]]] = {}
+        self._pending_changes: dict[str, frozenset[str]] = {}
+        self._added_listeners: list[Callable[[list[str]], None]] = []
+        self._removed_listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        self._pending_added: list[str] = []
+        self._pending_removed: list[str] = []
+        self._history: dict[str, EndpointHistory] = {}
+        self._failures: dict[str, _EndpointFailure] = {}
+        # Optimistic values per endpoint and field, with the monotonic time they expire at.
+        self._overlay: dict[str, dict[str, tuple[Any, float]]] = {}
+        # Room for a full window of samples at the shortest poll interval.
+        self._history_capacity = int(self.HISTORY_WINDOW / min_poll_interval) + 2
+        self._store = Store(hass, STORAGE_VERSION, storage_key(entry_id))
+        self._save_pending = False
+
+        # The options the coordinator was set up with, used to tell option changes from data updates.
+        self.entry_options: dict = {}
+
+        # True while the data comes from the persisted snapshot and no live refresh has succeeded yet.
+        self.stale = False
+
+        self.cycle_durations = LatencyHistogram()
+        self.last_cycle_duration: float | None = None
+        self.last_success: datetime | None = None
+
+    def get_endpoint(self, endpoint_id: str) -> EndpointState:
+        return self.data[endpoint_id]
+
+    def has_endpoint(self, endpoint_id: str) -> bool:
+        return self.data is not None and endpoint_id in self.data
+
+    def endpoint_available(self, endpoint_id: str) -> bool:
+        failure = self._failures.get(endpoint_id)
+        return self.has_endpoint(endpoint_id) and (failure is None or failure.count < self.MAX_ENDPOINT_FAILURES)
+
+    def endpoint_stale_since(self, endpoint_id: str) -> datetime | None:
+        """When polling the endpoint started failing, its data is the last good snapshot since then."""
+        failure = self._failures.get(endpoint_id)
+        return failure.since if failure is not None else None
+
+    def get_history(self, endpoint_id: str) -> EndpointHistory | None:
+        return self._history.get(endpoint_id)
+
+    @callback
+    def place_name(self, endpoint_id: str) -> str | None:
+        """The name of the place of an endpoint from the metadata cache, None until it was fetched."""
+        place_id = self.data[endpoint_id].place if self.has_endpoint(endpoint_id) else None
+        place = self.metadata.get(MetadataKind.PLACE, place_id) if place_id else None
+        return place.get("name") if place else None
+
+    @callback
+    def endpoint_metadata(self, endpoint_id: str) -> dict:
+        """Attributes of an endpoint from the metadata cache, never waits for the cloud."""
+        attributes = {}
+        place_name = self.place_name(endpoint_id)
+        if place_name is not None:
+            attributes["place"] = place_name
+        clients = self.metadata.get(MetadataKind.CLIENTS, endpoint_id)
+        if clients is not None:
+            attributes["clients"] = len(clients)
+        return attributes
+
+    @callback
+    def async_update_endpoint(self, endpoint_id: str, **changes) -> None:
+        """Apply an optimistic change to an endpoint and notify the entities of that endpoint.
+
+        The changed values are kept over polled data until a poll confirms them or `OVERLAY_TIMEOUT` passed, so a
+        poll that still returns the state from before the write does not revert them.
+        """
+        self.data[endpoint_id] = self.data[endpoint_id].replace(**changes)
+        expires_at = time.monotonic() + self.OVERLAY_TIMEOUT
+        overlay = self._overlay.setdefault(endpoint_id, {})
+        for name, value in changes.items():
+            overlay[name] = (value, expires_at)
+        self.async_update_endpoint_listeners(endpoint_id, frozenset(changes))
+
+    @callback
+    def async_discard_overlay(self, endpoint_id: str) -> None:
+        """Let the next poll of the endpoint win, e.g. after its write failed."""
+        self._overlay.pop(endpoint_id, None)
+
+    @callback
+    def async_add_endpoint_listener(self, endpoint_id: str, update_callback: CALLBACK_TYPE,
+                                    fields: frozenset[str] | None = None) -> CALLBACK_TYPE:
+        """Listen for changes of a single endpoint.
+
+        If fields are given the listener is only called when one of these fields changed.
+        """
+        listeners = self._endpoint_listeners.setdefault(endpoint_id, [])
+        listener = (update_callback, fields)
+        listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(listener)
+            if not listeners:
+                self._endpoint_listeners.pop(endpoint_id, None)
+
+        return remove_listener
+
+    @callback
+    def async_update_endpoint_listeners(self, endpoint_id: str, changed: frozenset[str] | None = None) -> None:
+        for update_callback, fields in list(self._endpoint_listeners.get(endpoint_id, ())):
+            if changed is None or fields is None or not fields.isdisjoint(changed):
+                update_callback()
+
+    @callback
+    def async_add_endpoints_added_listener(self, added_callback: Callable[[list[str]], None]) -> CALLBACK_TYPE:
+        """Listen for endpoints that appear on the account after the first refresh."""
+        self._added_listeners.append(added_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._added_listeners.remove(added_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_endpoint_removed_listener(self, endpoint_id: str, removed_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for the removal of an endpoint from the account."""
+        listeners = self._removed_listeners.setdefault(endpoint_id, [])
+        listeners.append(removed_callback)
+
+        @callback
+        def remove_listener() -> None:
+            if removed_callback in listeners:
+                listeners.remove(removed_callback)
+            if not listeners and self._removed_listeners.get(endpoint_id) is listeners:
+                del self._removed_listeners[endpoint_id]
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Dispatch the added and removed endpoints and the endpoint changes of the last refresh."""
+        removed, self._pending_removed = self._pending_removed, []
+        for endpoint_id in removed:
+            for removed_callback in self._removed_listeners.pop(endpoint_id, ()):
+                removed_callback()
+        if removed:
+            self._async_remove_devices(removed)
+
+        added, self._pending_added = self._pending_added, []
+        if added:
+            for added_callback in list(self._added_listeners):
+                added_callback(added)
+
+        super().async_update_listeners()
+
+        changes, self._pending_changes = self._pending_changes, {}
+        for endpoint_id, changed in changes.items():
+            self.async_update_endpoint_listeners(endpoint_id, changed)
+
+    async def async_refresh_endpoint(self, endpoint_id: str) -> None:
+        """Re-read a single endpoint and notify only the entities of that endpoint."""
+        try:
+            endpoint = await self._async_get_endpoint(endpoint_id)
+        except EndpointNotFound:
+            self.discovery.invalidate()
+            await self.async_request_refresh()
+            return
+        except Exception as err:  # pylint: disable=broad-except
+            # The endpoint is marked as pending, so the next poll picks it up.
+            _LOGGER.debug("Failed to refresh endpoint %s: %s", endpoint_id, err)
+            return
+
+        self.enforcer.async_enforce(endpoint)
+        self.async_apply_endpoint(endpoint)
+
+    @callback
+    def async_apply_endpoint(self, endpoint: EndpointState) -> None:
+        """Merge a freshly fetched endpoint into the data and notify the entities of that endpoint."""
+        if not self.has_endpoint(endpoint.id):
+            return
+
+        self.scheduler.observe(endpoint)
+        endpoint = self._apply_overlay(endpoint)
+        changed = endpoint.diff(self.data[endpoint.id])
+        self.data[endpoint.id] = endpoint
+        self._record_history(endpoint)
+        if changed:
+            self._async_save_snapshot()
+            self.async_update_endpoint_listeners(endpoint.id, changed)
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        await self.writes.async_flush()
+        self.enforcer.async_cancel()
+        self.metadata.async_cancel()
+
+    async def async_load_snapshot(self) -> bool:
+        """Load the last persisted data so entities can be set up before the first refresh."""
+        stored = await self._store.async_load()
+        if not stored or not stored.get("endpoints"):
+            return False
+
+        self.data = {x["id"]: EndpointState(**x) for x in stored["endpoints"]}
+        self.stale = True
+        return True
+
+    @callback
+    def _async_save_snapshot(self) -> None:
+        # Store.async_delay_save restarts its timer on every call, schedule the save once so polls that keep
+        # changing the data cannot postpone it until shutdown.
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._snapshot_data, STORAGE_SAVE_DELAY)
+
+    def _snapshot_data(self) -> dict:
+        self._save_pending = False
+        return {"endpoints": [x.as_dict() for x in self.data.values()]}
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
@@ -37,26 +296,257 @@ class CosaCoordinator(DataUpdateCoordinator):
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
         """
+        started = time.monotonic()
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
-            async with async_timeout.timeout(15):
-                self._update_endpoint_counter -= 1
-                if self._update_endpoint_counter <= 0:
-                    self._update_endpoint_counter = round(self.UPDATE_DATA_INTERVAL / self.UPDATE_ENDPOINTS_INTERVAL)
-                    self._endpoints = await self.cosa_api.get_endpoints()
-
-                result = await asyncio.gather(*[self.cosa_api.get_endpoint_info(x["id"]) for x in self._endpoints])
-                tasks = []
-                for endpoint in result:
-                    if endpoint["mode"] != Mode.MANUAL:
-                        tasks.append(self.cosa_api.set_mode(endpoint["id"], Mode.MANUAL, endpoint["option"]))
-                await asyncio.gather(*tasks)
-
-                return result
-        except ApiAuthError as err:
+            try:
+                data, result = await self._async_poll()
+            except EndpointNotFound as err:
+                # The cached endpoint list is out of date, refresh it before its TTL expires.
+                _LOGGER.debug("Endpoint %s not found, refreshing endpoint list", err)
+                self.discovery.invalidate()
+                data, result = await self._async_fetch_endpoints(await self._async_list_endpoints())
+
+            for endpoint in result:
+                self.enforcer.async_enforce(endpoint)
+
+            if self._overlay:
+                data = {endpoint_id: self._apply_overlay(x) for endpoint_id, x in data.items()}
+            changed = self._track_changes(data)
+            self._retain(data)
+            now = time.monotonic()
+            for endpoint in data.values():
+                self._record_history(endpoint, now)
+            self.stale = False
+            self.last_success = dt_util.utcnow()
+            if changed:
+                # Scheduled before the data is set, the save reads it once the delay passed.
+                self._async_save_snapshot()
+            return data
+        except (ApiAuthError, InvalidAuth) as err:
             # Raising ConfigEntryAuthFailed will cancel future updates
             # and start a config flow with SOURCE_REAUTH (async_step_reauth)
             raise ConfigEntryAuthFailed from err
-        except ApiError as err:
+        except (ApiError, CannotConnect) as err:
             raise UpdateFailed(f"Error communicating with API: {err}")
+        finally:
+            self.last_cycle_duration = time.monotonic() - started
+            self.cycle_durations.observe(self.last_cycle_duration)
+            self._apply_circuit_backoff()
+
+    @property
+    def last_success_age(self) -> float | None:
+        if self.last_success is None:
+            return None
+        return (dt_util.utcnow() - self.last_success).total_seconds()
+
+    def as_dict(self) -> dict:
+        return {
+            "endpoints": len(self.data or {}),
+            "stale": self.stale,
+            "last_update_success": self.last_update_success,
+            "update_interval": self.update_interval.total_seconds() if self.update_interval else None,
+            "last_cycle_duration": self.last_cycle_duration,
+            "cycle_durations": self.cycle_durations.as_dict(),
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "last_success_age": self.last_success_age,
+            "poll_intervals": self.scheduler.as_dict(),
+            "bulk_polling": self.bulk.as_dict() if self.bulk is not None else None,
+            "pending_overlays": {endpoint_id: sorted(x) for endpoint_id, x in self._overlay.items()},
+            "failing_endpoints": {endpoint_id: x.as_dict() for endpoint_id, x in self._failures.items()},
+            "metadata": self.metadata.as_dict(),
+        }
+
+    @callback
+    def _async_remove_devices(self, endpoint_ids: list[str]) -> None:
+        """Detach the devices of removed endpoints from the entry, a device no other entry uses is deleted."""
+        device_registry = dr.async_get(self.hass)
+        for endpoint_id in endpoint_ids:
+            device = device_registry.async_get_device(identifiers={(DOMAIN, endpoint_id)})
+            if device is not None and self.entry_id in device.config_entries:
+                device_registry.async_update_device(device.id, remove_config_entry_id=self.entry_id)
+
+    @callback
+    def _async_metadata_updated(self, kind: MetadataKind, key: str) -> None:
+        if not self.data:
+            return
+        if kind == MetadataKind.PLACE:
+            endpoint_ids = [x.id for x in self.data.values() if x.place == key]
+        else:
+            endpoint_ids = [key] if key in self.data else []
+
+        device_registry = dr.async_get(self.hass)
+        for endpoint_id in endpoint_ids:
+            if kind == MetadataKind.PLACE:
+                device = device_registry.async_get_device(identifiers={(DOMAIN, endpoint_id)})
+                place_name = self.place_name(endpoint_id)
+                if device is not None and place_name is not None:
+                    # Only assigns an area if the user did not pick one for the device.
+                    device_registry.async_update_device(device.id, suggested_area=place_name)
+            self.async_update_endpoint_listeners(endpoint_id, frozenset((METADATA_FIELD,)))
+
+    def _apply_circuit_backoff(self) -> None:
+        """Stretch the poll interval while the circuit breaker rejects requests."""
+        retry_after = timedelta(seconds=self.cosa_api.circuit_breaker.retry_after)
+        self.update_interval = max(self.min_poll_interval, retry_after)
+
+    def _record_history(self, endpoint: EndpointState, now: float | None = None) -> None:
+        history = self._history.get(endpoint.id)
+        if history is None:
+            history = self._history[endpoint.id] = EndpointHistory(self.HISTORY_WINDOW.total_seconds(),
+                                                                   self._history_capacity)
+        history.record(endpoint, now)
+
+    def _apply_overlay(self, endpoint: EndpointState, now: float | None = None) -> EndpointState:
+        """Merge polled data under the pending optimistic values of the endpoint.
+
+        A value is dropped from the overlay once the poll confirms it or once it expired.
+        """
+        overlay = self._overlay.get(endpoint.id)
+        if not overlay:
+            return endpoint
+        if now is None:
+            now = time.monotonic()
+
+        pending = {}
+        for name, (value, expires_at) in list(overlay.items()):
+            if getattr(endpoint, name) == value or now >= expires_at:
+                del overlay[name]
+            else:
+                pending[name] = value
+        if not overlay:
+            del self._overlay[endpoint.id]
+        return endpoint.replace(**pending) if pending else endpoint
+
+    def _retain(self, data: dict[str, EndpointState]) -> None:
+        """Drop the history, failures and overlays of endpoints that are no longer on the account."""
+        for state in (self._history, self._failures, self._overlay):
+            for endpoint_id in list(state):
+                if endpoint_id not in data:
+                    del state[endpoint_id]
+
+    def _track_changes(self, data: dict[str, EndpointState]) -> bool:
+        """Remember which fields of which endpoints changed so only the affected entities are updated.
+
+        Endpoints that appeared on or disappeared from the account are remembered as well, so the platforms can
+        add and remove just their entities. Returns whether anything changed.
+        """
+        previous = self.data or {}
+        changes = self.data is None or data.keys() != previous.keys()
+        if self.data is not None:
+            added = [x for x in data if x not in previous]
+            removed = [x for x in previous if x not in data]
+            if added or removed:
+                _LOGGER.info("Endpoints added: %s, removed: %s", added, removed)
+            self._pending_added.extend(x for x in added if x not in self._pending_added)
+            self._pending_removed.extend(x for x in removed if x not in self._pending_removed)
+        for endpoint_id, endpoint in data.items():
+            if endpoint is previous.get(endpoint_id):
+                continue
+            changed = endpoint.diff(previous.get(endpoint_id))
+            if changed:
+                self._pending_changes[endpoint_id] = self._pending_changes.get(endpoint_id, frozenset()) | changed
+                changes = True
+        return changes
+
+    async def _async_poll(self) -> tuple[dict[str, EndpointState], list[EndpointState]]:
+        if self.bulk is None or (self.bulk.list_fields is not None and not self.bulk.available):
+            return await self._async_fetch_endpoints(await self._async_list_endpoints())
+
+        # The list is read every cycle, so it keeps the discovery cache fresh as well.
+        async with async_timeout.timeout(self.LIST_TIMEOUT):
+            endpoints = await self.cosa_api.get_endpoints()
+        self.discovery.update(endpoints)
+        if not self.bulk.probe(endpoints):
+            return await self._async_fetch_endpoints(endpoints)
+        return await self._async_fetch_bulk(endpoints)
+
+    async def _async_fetch_bulk(self, endpoints) -> tuple[dict[str, EndpointState], list[EndpointState]]:
+        """Take the live fields from the endpoint list and fetch only the endpoints the list cannot cover.
+
+        Returns the new id-keyed data and the states to check the mode of, every endpoint on the account since
+        the list covers them all. The enforcer's cooldown keeps an unchanged endpoint from being written again
+        before a failed or ignored mode change may be retried.
+        """
+        endpoint_ids = [x["id"] for x in endpoints]
+        self.scheduler.retain(endpoint_ids)
+        self.bulk.retain(endpoint_ids)
+
+        previous = self.data or {}
+        listed, due = self.bulk.merge(endpoints, previous)
+        # An endpoint whose fetch failed keeps the list fields merged into its last good state.
+        fetched = await self._async_fetch_isolated(due)
+        self.bulk.mark_fetched(x.id for x in fetched)
+        for endpoint in fetched:
+            self.scheduler.observe(endpoint)
+
+        fresh = {x.id: x for x in fetched}
+        data = {x: fresh.get(x) or listed[x] for x in endpoint_ids if x in fresh or x in listed}
+        return data, list(data.values())
+
+    async def _async_fetch_endpoints(self, endpoints) -> tuple[dict[str, EndpointState], list[EndpointState]]:
+        """Poll the endpoints that are due.
+
+        Returns the new id-keyed data, holding the previous states of the endpoints that were not due,
+        and the freshly polled states.
+        """
+        endpoint_ids = [x["id"] for x in endpoints]
+        self.scheduler.retain(endpoint_ids)
+        due = self.scheduler.due_endpoints(endpoint_ids)
+
+        result = await self._async_fetch_isolated(due, endpoint_ids)
+        for endpoint in result:
+            self.scheduler.observe(endpoint)
+
+        previous = self.data or {}
+        fresh = {x.id: x for x in result}
+        data = {x: fresh.get(x) or previous[x] for x in endpoint_ids if x in fresh or x in previous}
+        return data, result
+
+    async def _async_list_endpoints(self):
+        async with async_timeout.timeout(self.LIST_TIMEOUT):
+            return await self.discovery.async_get_endpoints()
+
+    async def _async_fetch_isolated(self, endpoint_ids: list[str],
+                                    account_ids: list[str] | None = None) -> list[EndpointState]:
+        """Fetch the endpoints concurrently, each under the deadline of its own requests.
+
+        A failing endpoint keeps its last good state and is counted as failing. The cycle only fails on signals
+        that concern the whole account: auth errors, an open circuit, or every endpoint in `account_ids` failing.
+        Without `account_ids`, e.g. when the endpoint list was just read, fetch errors never fail the cycle.
+        """
+        results = await asyncio.gather(*[self._async_get_endpoint(x) for x in endpoint_ids], return_exceptions=True)
+
+        fetched, errors = [], {}
+        for endpoint_id, result in zip(endpoint_ids, results):
+            if isinstance(result, (EndpointNotFound, ApiAuthError, InvalidAuth, asyncio.CancelledError)):
+                raise result
+            if isinstance(result, BaseException):
+                errors[endpoint_id] = result
+            else:
+                fetched.append(result)
+                self._failures.pop(endpoint_id, None)
+
+        if errors and account_ids is not None:
+            circuit_open = next((x for x in errors.values() if isinstance(x, CircuitOpen)), None)
+            if circuit_open is not None:
+                raise circuit_open
+            if not fetched and all(x in errors or x in self._failures for x in account_ids):
+                # No endpoint of the account gets through, the cloud is failing rather than single endpoints.
+                raise next(iter(errors.values()))
+
+        now = dt_util.utcnow()
+        for endpoint_id, err in errors.items():
+            failure = self._failures.get(endpoint_id)
+            if failure is None:
+                failure = self._failures[endpoint_id] = _EndpointFailure(now)
+            failure.count += 1
+            failure.error = repr(err)
+            _LOGGER.debug("Failed to poll endpoint %s (%d in a row): %r", endpoint_id, failure.count, err)
+        return fetched
+
+    async def _async_get_endpoint(self, endpoint_id: str) -> EndpointState:
+        if self.hub is not None:
+            return await self.hub.async_get_endpoint(self, endpoint_id)
+        return EndpointState.from_payload(await self.cosa_api.get_endpoint_info(endpoint_id))
@@ -0,0 +1,32 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_HUB
+from .coordinator import CosaCoordinator
+
+TO_REDACT = {"auth_token", "email", "password"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    coordinator: CosaCoordinator = hass.data[DOMAIN][entry.entry_id]
+    cosa_api = coordinator.cosa_api
+    hub = hass.data.get(DATA_HUB)
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": coordinator.as_dict(),
+        "api": {
+            "token_renewals": cosa_api.token_renewals,
+            "paths": cosa_api.metrics.as_dict(),
+        },
+        "request_scheduler": cosa_api.scheduler.as_dict(),
+        "circuit_breaker": cosa_api.circuit_breaker.as_dict(),
+        "discovery": coordinator.discovery.as_dict(),
+        "enforcer": coordinator.enforcer.as_dict(),
+        "writes": coordinator.writes.as_dict(),
+        "hub": hub.as_dict() if hub is not None else None,
+    }
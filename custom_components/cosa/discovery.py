@@ -0,0 +1,62 @@
+import logging
+import time
+from datetime import timedelta
+
+from .api import CosaApi
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EndpointDiscovery:
+    """Slow tier that caches the account's endpoint list between polls."""
+
+    def __init__(self, cosa_api: CosaApi, ttl: timedelta):
+        self.cosa_api = cosa_api
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.forced_refreshes = 0
+
+        self._endpoints = []
+        self._expires_at = 0.0
+        self._force_refresh = False
+
+    @property
+    def endpoints(self):
+        return self._endpoints
+
+    def invalidate(self) -> None:
+        """Refresh the endpoint list on the next lookup regardless of its TTL."""
+        self._force_refresh = True
+
+    def update(self, endpoints) -> None:
+        """Store an endpoint list that was fetched elsewhere, restarting its TTL."""
+        self._endpoints = endpoints
+        self._expires_at = time.monotonic() + self.ttl.total_seconds()
+        self._force_refresh = False
+
+    async def async_get_endpoints(self):
+        now = time.monotonic()
+        if self._force_refresh:
+            self.forced_refreshes += 1
+        elif now < self._expires_at:
+            self.hits += 1
+            return self._endpoints
+        else:
+            self.misses += 1
+
+        self._endpoints = await self.cosa_api.get_endpoints()
+        self._expires_at = now + self.ttl.total_seconds()
+        self._force_refresh = False
+        _LOGGER.debug("Discovered %d endpoints", len(self._endpoints))
+
+        return self._endpoints
+
+    def as_dict(self) -> dict:
+        return {
+            "endpoints": len(self._endpoints),
+            "hits": self.hits,
+            "misses": self.misses,
+            "forced_refreshes": self.forced_refreshes,
+        }
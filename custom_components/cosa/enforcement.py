@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from .api import CosaApi
+from .models.mode import Mode
+from .state import EndpointState
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ModeEnforcer:
+    """Switches endpoints back to manual mode without holding up the poll that noticed it.
+
+    A mode change is issued at most once per cooldown for an endpoint, so the cloud lag between the write and
+    the next poll does not result in repeated writes.
+    """
+
+    COOLDOWN = timedelta(minutes=1)
+
+    def __init__(self, hass: HomeAssistant, cosa_api: CosaApi, cooldown: timedelta = COOLDOWN):
+        self.hass = hass
+        self.cosa_api = cosa_api
+        self.cooldown = cooldown.total_seconds()
+
+        self.issued = 0
+        self.suppressed = 0
+        self.failed = 0
+
+        self._issued_at: dict[str, float] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @callback
+    def async_enforce(self, endpoint: EndpointState) -> None:
+        if endpoint.mode == Mode.MANUAL:
+            self._issued_at.pop(endpoint.id, None)
+            return
+
+        issued_at = self._issued_at.get(endpoint.id)
+        if endpoint.id in self._tasks or (issued_at is not None and time.monotonic() - issued_at < self.cooldown):
+            self.suppressed += 1
+            return
+
+        self._issued_at[endpoint.id] = time.monotonic()
+        self._tasks[endpoint.id] = self.hass.async_create_background_task(
+            self._async_set_manual(endpoint), "cosa_set_manual_mode_%s" % endpoint.id
+        )
+
+    async def _async_set_manual(self, endpoint: EndpointState) -> None:
+        try:
+            _LOGGER.debug("Switching endpoint %s from %s to manual mode", endpoint.id, endpoint.mode)
+            await self.cosa_api.set_mode(endpoint.id, Mode.MANUAL, endpoint.option)
+            self.issued += 1
+        except Exception as err:  # pylint: disable=broad-except
+            self.failed += 1
+            _LOGGER.warning("Failed to switch endpoint %s to manual mode: %s", endpoint.id, err)
+        finally:
+            self._tasks.pop(endpoint.id, None)
+
+    @callback
+    def async_cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def as_dict(self) -> dict:
+        return {
+            "issued": self.issued,
+            "suppressed": self.suppressed,
+            "failed": self.failed,
+            "in_flight": len(self._tasks),
+        }
@@ -0,0 +1,111 @@
+from typing import Callable, Iterable
+
+from .const import DOMAIN
+from .coordinator import CosaCoordinator
+from .state import EndpointState
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import (
+    CoordinatorEntity
+)
+
+
+@callback
+def async_add_endpoint_entities(entry: ConfigEntry, coordinator: CosaCoordinator,
+                                async_add_entities: AddEntitiesCallback,
+                                create_entities: Callable[[str], Iterable[Entity]],
+                                update_before_add: bool = False) -> None:
+    """Add the entities of the current endpoints, and of every endpoint that is added to the account later."""
+    async_add_entities([x for endpoint_id in coordinator.data for x in create_entities(endpoint_id)],
+                       update_before_add)
+
+    @callback
+    def endpoints_added(endpoint_ids: list[str]) -> None:
+        async_add_entities([x for endpoint_id in endpoint_ids for x in create_entities(endpoint_id)])
+
+    entry.async_on_unload(coordinator.async_add_endpoints_added_listener(endpoints_added))
+
+
+class CosaEntity(CoordinatorEntity):
+    """Base entity for all endpoint entities of a Cosa coordinator.
+
+    Entities are only updated when one of the endpoint fields in `endpoint_fields` changed, the coordinator
+    listener only takes care of availability changes. Entities remove themselves, including their registry
+    entries, when their endpoint is removed from the account.
+    """
+
+    coordinator: CosaCoordinator
+    endpoint_fields: frozenset[str] | None = None
+
+    def __init__(self, coordinator: CosaCoordinator, endpoint_id: str):
+        super().__init__(coordinator)
+        self.endpoint_id = endpoint_id
+        self._written_status = None
+
+    @property
+    def endpoint(self) -> EndpointState:
+        return self.coordinator.data[self.endpoint_id]
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.endpoint_available(self.endpoint_id)
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, self.endpoint_id)},
+            name=self.endpoint.name,
+            manufacturer="Cosa",
+            suggested_area=self.coordinator.place_name(self.endpoint_id),
+        )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._written_status = self._status()
+        self.async_on_remove(
+            self.coordinator.async_add_endpoint_listener(self.endpoint_id, self._handle_endpoint_update,
+                                                         self.endpoint_fields)
+        )
+        self.async_on_remove(
+            self.coordinator.async_add_endpoint_removed_listener(self.endpoint_id, self._handle_endpoint_removed)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        status = self._status()
+        if status != self._written_status:
+            self._written_status = status
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_endpoint_update(self) -> None:
+        self._update_attrs(self.endpoint)
+        self._written_status = self._status()
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_endpoint_removed(self) -> None:
+        if self.registry_entry is not None:
+            # Removing the registry entry removes the entity as well.
+            er.async_get(self.hass).async_remove(self.entity_id)
+        else:
+            self.hass.async_create_task(self.async_remove(force_remove=True))
+
+    @callback
+    def _update_attrs(self, endpoint: EndpointState) -> None:
+        raise NotImplementedError
+
+    def _status(self) -> tuple:
+        return self.available, self.coordinator.stale, self.coordinator.endpoint_stale_since(self.endpoint_id)
+
+    @property
+    def extra_state_attributes(self):
+        stale_since = self.coordinator.endpoint_stale_since(self.endpoint_id)
+        if stale_since is not None:
+            return {"stale": True, "stale_since": stale_since.isoformat()}
+        if self.coordinator.stale:
+            return {"stale": True}
+        return None
@@ -15,3 +15,15 @@ class InvalidAuth(HomeAssistantError):
 
 class ApiError(HomeAssistantError):
     """Error to indicate there is invalid auth."""
+
+    def __init__(self, *args, code: int | None = None):
+        super().__init__(*args)
+        self.code = code
+
+
+class EndpointNotFound(ApiError):
+    """Error to indicate the requested endpoint is unknown to the API."""
+
+
+class CircuitOpen(CannotConnect):
+    """Error to indicate requests are paused after repeated connection failures."""
@@ -0,0 +1,165 @@
+import math
+import time
+from array import array
+from typing import Optional
+
+from .state import EndpointState
+
+NAN = float("nan")
+
+
+class EndpointHistory:
+    """Fixed-size ring buffer of the recent samples of one endpoint.
+
+    Samples of (time, temperature, humidity, combiState, targetTemperature) are kept in typed arrays. The sums
+    behind the heating rate and the duty cycle are updated as samples are added and evicted, so recording a
+    sample and reading the derived values are O(1).
+    """
+
+    # Shift the time origin to the oldest sample once a day, recomputing the sums drops accumulated rounding.
+    REBASE_AFTER = 86400
+    # Slower heating rates, in degrees per hour, are rounding noise of a flat temperature and give no estimate.
+    MIN_HEATING_RATE = 0.05
+
+    def __init__(self, window: float, capacity: int):
+        self.window = window
+        self.capacity = capacity
+
+        self._times = array("d", bytes(8 * capacity))
+        self._temperatures = array("d", bytes(8 * capacity))
+        self._humidities = array("d", bytes(8 * capacity))
+        self._targets = array("d", bytes(8 * capacity))
+        self._heating = array("b", bytes(capacity))
+        self._start = 0
+        self._size = 0
+        # Sample times are stored relative to an origin close to the oldest sample to keep the sums precise.
+        self._origin: Optional[float] = None
+
+        # Time the combi was on between the retained samples.
+        self._on_time = 0.0
+        # Least squares sums of temperature over time.
+        self._n = 0
+        self._sum_t = 0.0
+        self._sum_x = 0.0
+        self._sum_tt = 0.0
+        self._sum_tx = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def record(self, endpoint: EndpointState, now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        if self._origin is None or not self._size:
+            self._origin = now
+        elif now - self._origin > self.REBASE_AFTER:
+            self._rebase()
+        t = now - self._origin
+
+        if self._size:
+            last = self._index(self._size - 1)
+            if t <= self._times[last]:
+                return
+            if self._heating[last]:
+                self._on_time += t - self._times[last]
+
+        while self._size and (self._size == self.capacity or t - self._times[self._start] > self.window):
+            self._evict()
+
+        index = self._index(self._size)
+        self._size += 1
+        self._times[index] = t
+        self._temperatures[index] = NAN if endpoint.temperature is None else endpoint.temperature
+        self._humidities[index] = NAN if endpoint.humidity is None else endpoint.humidity
+        self._targets[index] = NAN if endpoint.targetTemperature is None else endpoint.targetTemperature
+        self._heating[index] = endpoint.combiState == "on"
+
+        temperature = self._temperatures[index]
+        if not math.isnan(temperature):
+            self._n += 1
+            self._sum_t += t
+            self._sum_x += temperature
+            self._sum_tt += t * t
+            self._sum_tx += t * temperature
+
+    @property
+    def span(self) -> float:
+        if self._size < 2:
+            return 0.0
+        return self._times[self._index(self._size - 1)] - self._times[self._start]
+
+    @property
+    def heating_rate(self) -> Optional[float]:
+        """Temperature change in degrees per hour, the slope of a least squares fit over the window."""
+        denominator = self._n * self._sum_tt - self._sum_t * self._sum_t
+        if self._n < 2 or denominator <= 0:
+            return None
+        return (self._n * self._sum_tx - self._sum_t * self._sum_x) / denominator * 3600
+
+    @property
+    def duty_cycle(self) -> Optional[float]:
+        """Percentage of the window the combi was on."""
+        span = self.span
+        if not span:
+            return None
+        return min(100.0, self._on_time / span * 100)
+
+    def time_to_target(self) -> Optional[float]:
+        """Minutes until the target temperature is reached at the current heating rate."""
+        if not self._size:
+            return None
+        last = self._index(self._size - 1)
+        temperature, target = self._temperatures[last], self._targets[last]
+        if math.isnan(temperature) or math.isnan(target):
+            return None
+        if temperature >= target:
+            return 0.0
+
+        rate = self.heating_rate
+        if rate is None or rate < self.MIN_HEATING_RATE:
+            return None
+        return (target - temperature) / rate * 60
+
+    def _index(self, offset: int) -> int:
+        return (self._start + offset) % self.capacity
+
+    def _evict(self) -> None:
+        index = self._start
+        t = self._times[index]
+        if self._size > 1 and self._heating[index]:
+            self._on_time -= self._times[self._index(1)] - t
+
+        temperature = self._temperatures[index]
+        if not math.isnan(temperature):
+            self._n -= 1
+            self._sum_t -= t
+            self._sum_x -= temperature
+            self._sum_tt -= t * t
+            self._sum_tx -= t * temperature
+
+        self._start = self._index(1)
+        self._size -= 1
+        if not self._size:
+            self._on_time = 0.0
+            self._n = 0
+            self._sum_t = self._sum_x = self._sum_tt = self._sum_tx = 0.0
+
+    def _rebase(self) -> None:
+        shift = self._times[self._start]
+        self._origin += shift
+        self._on_time = 0.0
+        self._n = 0
+        self._sum_t = self._sum_x = self._sum_tt = self._sum_tx = 0.0
+        for offset in range(self._size):
+            index = self._index(offset)
+            t = self._times[index] = self._times[index] - shift
+            if offset and self._heating[self._index(offset - 1)]:
+                self._on_time += t - self._times[self._index(offset - 1)]
+
+            temperature = self._temperatures[index]
+            if not math.isnan(temperature):
+                self._n += 1
+                self._sum_t += t
+                self._sum_x += temperature
+                self._sum_tt += t * t
+                self._sum_tx += t * temperature
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from aiohttp import ClientSession
+
+from .const import DATA_HUB
+from .exceptions import ApiAuthError, EndpointNotFound, InvalidAuth
+from .request_scheduler import RequestScheduler
+from .retry import CircuitBreaker
+from .session import ConnectionStats, create_session
+from .state import EndpointState
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+if TYPE_CHECKING:
+    from .coordinator import CosaCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CosaDomainHub:
+    """Transport and polling state shared by all Cosa config entries.
+
+    Entries talking to the same host share an HTTP session, a request scheduler and a circuit breaker. The
+    sessions are closed once the last entry is unloaded. Endpoints shared between
+    accounts are fetched once: concurrent fetches of the same endpoint id wait on a single request and the
+    result is handed to every entry that has the endpoint.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+
+        self.fetches = 0
+        self.deduplicated = 0
+        self.fanned_out = 0
+
+        self._sessions: dict[str, ClientSession] = {}
+        self._connection_stats: dict[str, ConnectionStats] = {}
+        self._schedulers: dict[str, RequestScheduler] = {}
+        self._circuit_breakers: dict[str, CircuitBreaker] = {}
+        self._coordinators: list["CosaCoordinator"] = []
+        self._in_flight: dict[str, tuple[asyncio.Task, "CosaCoordinator", set["CosaCoordinator"]]] = {}
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, self._async_on_close)
+
+    def get_session(self, host: str, max_connections: int) -> ClientSession:
+        """The session for a host, its connection pool is sized when the session is created."""
+        session = self._sessions.get(host)
+        if session is None or session.closed:
+            stats = self._connection_stats.setdefault(host, ConnectionStats())
+            session = self._sessions[host] = create_session(max_connections, stats)
+        return session
+
+    def get_scheduler(self, host: str, max_concurrency: int, rate: float) -> RequestScheduler:
+        scheduler = self._schedulers.get(host)
+        if scheduler is None:
+            scheduler = self._schedulers[host] = RequestScheduler(max_concurrency=max_concurrency, rate=rate)
+        else:
+            # The options of the entry set up last apply to the shared scheduler. The connection pool is sized when
+            # the session is created, more slots than connections would only queue inside the connector.
+            session = self._sessions.get(host)
+            if session is not None and not session.closed and max_concurrency > session.connector.limit:
+                _LOGGER.debug("Limiting the requests to %s to the %d pooled connections",
+                              host, session.connector.limit)
+                max_concurrency = session.connector.limit
+            scheduler.max_concurrency = max_concurrency
+            scheduler.rate = rate
+        return scheduler
+
+    def get_circuit_breaker(self, host: str) -> CircuitBreaker:
+        circuit_breaker = self._circuit_breakers.get(host)
+        if circuit_breaker is None:
+            circuit_breaker = self._circuit_breakers[host] = CircuitBreaker(host)
+        return circuit_breaker
+
+    @callback
+    def async_register(self, coordinator: "CosaCoordinator") -> CALLBACK_TYPE:
+        self._coordinators.append(coordinator)
+
+        @callback
+        def unregister() -> None:
+            self._coordinators.remove(coordinator)
+            if not self._coordinators:
+                # Detach the sessions right away, an entry that is set up again gets a new session.
+                sessions, self._sessions = self._sessions, {}
+                self.hass.async_create_background_task(self._async_close_sessions(sessions),
+                                                       "cosa_close_sessions")
+
+        return unregister
+
+    async def async_get_endpoint(self, requester: "CosaCoordinator", endpoint_id: str) -> EndpointState:
+        """Fetch an endpoint, joining a fetch of the same endpoint that is already in flight."""
+        if len(self._coordinators) < 2:
+            return await self._async_fetch(requester, endpoint_id)
+
+        in_flight = self._in_flight.get(endpoint_id)
+        if in_flight is not None:
+            task, owner, receivers = in_flight
+            receivers.add(requester)
+            self.deduplicated += 1
+            try:
+                return await asyncio.shield(task)
+            except (ApiAuthError, InvalidAuth, EndpointNotFound):
+                if requester is owner:
+                    raise
+                # The joined fetch ran with the token of another account, its auth or not found error says
+                # nothing about the requester's account.
+                return await self._async_fetch(requester, endpoint_id)
+
+        self.fetches += 1
+        task = self.hass.async_create_task(self._async_fetch(requester, endpoint_id))
+        receivers = {requester}
+        self._in_flight[endpoint_id] = (task, requester, receivers)
+        task.add_done_callback(lambda _: self._async_fan_out(endpoint_id, task, receivers))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _async_fetch(requester: "CosaCoordinator", endpoint_id: str) -> EndpointState:
+        return EndpointState.from_payload(await requester.cosa_api.get_endpoint_info(endpoint_id))
+
+    @callback
+    def _async_fan_out(self, endpoint_id: str, task: asyncio.Task, receivers: set["CosaCoordinator"]) -> None:
+        if self._in_flight.get(endpoint_id, (None,))[0] is task:
+            del self._in_flight[endpoint_id]
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        endpoint = task.result()
+        for coordinator in self._coordinators:
+            if coordinator not in receivers and coordinator.has_endpoint(endpoint_id):
+                self.fanned_out += 1
+                coordinator.async_apply_endpoint(endpoint)
+
+    async def _async_close_sessions(self, sessions: dict[str, ClientSession]) -> None:
+        for session in sessions.values():
+            await session.close()
+
+    async def _async_on_close(self, event: Event) -> None:
+        sessions, self._sessions = self._sessions, {}
+        await self._async_close_sessions(sessions)
+
+    def as_dict(self) -> dict:
+        return {
+            "entries": len(self._coordinators),
+            "fetches": self.fetches,
+            "deduplicated": self.deduplicated,
+            "fanned_out": self.fanned_out,
+            "connections": {host: x.as_dict() for host, x in self._connection_stats.items()},
+            "schedulers": {host: x.as_dict() for host, x in self._schedulers.items()},
+            "circuit_breakers": {host: x.as_dict() for host, x in self._circuit_breakers.items()},
+        }
+
+
+@callback
+def async_get_domain_hub(hass: HomeAssistant) -> CosaDomainHub:
+    if (hub := hass.data.get(DATA_HUB)) is None:
+        hub = hass.data[DATA_HUB] = CosaDomainHub(hass)
+    return hub
@@ -0,0 +1,56 @@
+import time
+from collections import deque
+from typing import Optional
+
+from .metrics import ApiMetrics, LatencyHistogram
+
+
+class LatencyPolicy:
+    """Derives the deadline and the hedge delay of a request from the latencies recently observed for its path.
+
+    The percentiles cover the last `WINDOWS` snapshot intervals only, so a cloud that became slower moves the
+    deadline within minutes instead of being outweighed by days of fast responses. Until a path has enough recent
+    samples the static maximum deadline applies and requests are not hedged.
+    """
+
+    MIN_SAMPLES = 20
+    # The deadline leaves room for this many times the 99th percentile.
+    DEADLINE_FACTOR = 3
+    MIN_DEADLINE = 2.0
+    MIN_HEDGE_DELAY = 0.05
+    # Seconds between snapshots of the lifetime histogram, and the number of intervals the window spans.
+    WINDOW_INTERVAL = 300
+    WINDOWS = 6
+
+    def __init__(self, metrics: ApiMetrics, max_deadline: float):
+        self.metrics = metrics
+        self.max_deadline = max_deadline
+
+        self._snapshots: dict[str, deque[tuple[float, LatencyHistogram]]] = {}
+
+    def recent(self, path: str, now: Optional[float] = None) -> LatencyHistogram:
+        """The latencies of a path observed within the window."""
+        if now is None:
+            now = time.monotonic()
+        latency = self.metrics.path(path).latency
+        snapshots = self._snapshots.get(path)
+        if snapshots is None:
+            snapshots = self._snapshots[path] = deque([(now, LatencyHistogram())], maxlen=self.WINDOWS + 1)
+        elif now - snapshots[-1][0] >= self.WINDOW_INTERVAL:
+            snapshots.append((now, latency.copy()))
+        return latency.since(snapshots[0][1])
+
+    def deadline(self, path: str, attempt: int = 1) -> float:
+        """The deadline of a request, doubled for every retry so a timeout is not repeated with the same cut-off."""
+        latency = self.recent(path)
+        if latency.count < self.MIN_SAMPLES:
+            return self.max_deadline
+        deadline = max(self.MIN_DEADLINE, latency.percentile(99) * self.DEADLINE_FACTOR)
+        return min(self.max_deadline, deadline * 2 ** (attempt - 1))
+
+    def hedge_delay(self, path: str) -> Optional[float]:
+        """How long to wait for a response before sending a duplicate request, None to not hedge."""
+        latency = self.recent(path)
+        if latency.count < self.MIN_SAMPLES:
+            return None
+        return max(self.MIN_HEDGE_DELAY, latency.percentile(95))
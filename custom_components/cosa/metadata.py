@@ -0,0 +1,124 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from enum import StrEnum
+from typing import Any, Callable
+
+from .api import CosaApi
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Pseudo field endpoint listeners subscribe to for metadata changes.
+METADATA_FIELD = "metadata"
+
+
+class MetadataKind(StrEnum):
+    PLACE = "place"
+    CLIENTS = "clients"
+
+
+_FETCHERS: dict[MetadataKind, Callable[[CosaApi, str], Any]] = {
+    MetadataKind.PLACE: lambda cosa_api, key: cosa_api.get_place(key),
+    MetadataKind.CLIENTS: lambda cosa_api, key: cosa_api.get_endpoint_clients(key),
+}
+
+
+class MetadataCache:
+    """Slow tier for metadata that rarely changes: the places and the clients of the endpoints.
+
+    Lookups never wait for the cloud. A missing or expired entry is fetched in the background and the cached
+    value, if any, is returned meanwhile; `on_update` is called once the fetch finished. Places are cached by
+    their id, so endpoints in the same place share an entry. The least recently used entries are evicted once
+    `max_entries` is reached.
+    """
+
+    TTL = timedelta(hours=12)
+    MAX_ENTRIES = 256
+    # Wait before fetching an entry again after a failed fetch.
+    ERROR_RETRY = timedelta(minutes=5)
+
+    def __init__(self, hass: HomeAssistant, cosa_api: CosaApi,
+                 on_update: Callable[[MetadataKind, str], None],
+                 ttl: timedelta = TTL, max_entries: int = MAX_ENTRIES):
+        self.hass = hass
+        self.cosa_api = cosa_api
+        self.on_update = on_update
+        self.ttl = ttl.total_seconds()
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.errors = 0
+        self.evictions = 0
+
+        self._entries: OrderedDict[tuple[MetadataKind, str], tuple[Any, float]] = OrderedDict()
+        self._fetching: dict[tuple[MetadataKind, str], Any] = {}
+
+    @callback
+    def get(self, kind: MetadataKind, key: str) -> Any:
+        cache_key = (kind, key)
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            self.misses += 1
+            self._async_schedule_fetch(cache_key)
+            return None
+
+        self._entries.move_to_end(cache_key)
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._async_schedule_fetch(cache_key)
+        else:
+            self.hits += 1
+        return value
+
+    @callback
+    def async_cancel(self) -> None:
+        for task in self._fetching.values():
+            task.cancel()
+        self._fetching.clear()
+
+    @callback
+    def _async_schedule_fetch(self, cache_key: tuple[MetadataKind, str]) -> None:
+        if cache_key in self._fetching:
+            return
+        self._fetching[cache_key] = self.hass.async_create_background_task(
+            self._async_fetch(cache_key), "cosa_metadata_%s" % cache_key[0]
+        )
+
+    async def _async_fetch(self, cache_key: tuple[MetadataKind, str]) -> None:
+        kind, key = cache_key
+        self.fetches += 1
+        try:
+            value = await _FETCHERS[kind](self.cosa_api, key)
+        except Exception as err:  # pylint: disable=broad-except
+            self.errors += 1
+            _LOGGER.debug("Failed to fetch %s %s: %s", kind, key, err)
+            # Keep what is cached, or remember the miss, so lookups do not retry on every state write.
+            previous = self._entries.get(cache_key)
+            self._store(cache_key, previous[0] if previous else None, self.ERROR_RETRY.total_seconds())
+            return
+        finally:
+            self._fetching.pop(cache_key, None)
+
+        self._store(cache_key, value, self.ttl)
+        self.on_update(kind, key)
+
+    def _store(self, cache_key: tuple[MetadataKind, str], value: Any, ttl: float) -> None:
+        self._entries[cache_key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable
+
+
+class LatencyHistogram:
+    """Latencies in seconds, counted in fixed buckets."""
+
+    BOUNDS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts = [x + y for x, y in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "LatencyHistogram":
+        histogram = LatencyHistogram()
+        histogram.merge(self)
+        return histogram
+
+    def since(self, earlier: "LatencyHistogram") -> "LatencyHistogram":
+        """The observations made after `earlier`, a copy of this histogram taken before.
+
+        The max is not windowed and stays the max of all observations.
+        """
+        histogram = LatencyHistogram()
+        histogram.counts = [x - y for x, y in zip(self.counts, earlier.counts)]
+        histogram.count = self.count - earlier.count
+        histogram.total = self.total - earlier.total
+        histogram.max = self.max
+        return histogram
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile, capped at the largest observed latency."""
+        if not self.count:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        buckets = {"le_%s" % bound: count for bound, count in zip(self.BOUNDS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "buckets": buckets,
+        }
+
+
+class PathMetrics:
+    __slots__ = ("requests", "retries", "hedges", "hedge_wins", "errors", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.errors: Counter = Counter()
+        self.latency = LatencyHistogram()
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "errors": dict(self.errors),
+            "latency": self.latency.as_dict(),
+        }
+
+
+class ApiMetrics:
+    """Request, retry and error counts and response latencies per API path."""
+
+    def __init__(self):
+        self.paths: dict[str, PathMetrics] = {}
+
+    def path(self, path: str) -> PathMetrics:
+        metrics = self.paths.get(path)
+        if metrics is None:
+            metrics = self.paths[path] = PathMetrics()
+        return metrics
+
+    @property
+    def requests(self) -> int:
+        return sum(x.requests for x in self.paths.values())
+
+    @property
+    def retries(self) -> int:
+        return sum(x.retries for x in self.paths.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(sum(x.errors.values()) for x in self.paths.values())
+
+    def latency(self, paths: Iterable[str] | None = None) -> LatencyHistogram:
+        """The latencies of the given paths, or of all paths, in a single histogram."""
+        histogram = LatencyHistogram()
+        for path, metrics in self.paths.items():
+            if paths is None or path in paths:
+                histogram.merge(metrics.latency)
+        return histogram
+
+    def as_dict(self) -> dict:
+        return {path: metrics.as_dict() for path, metrics in sorted(self.paths.items())}
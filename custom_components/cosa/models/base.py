@@ -1,8 +1,34 @@
-from pydantic import BaseModel as PydanticBaseModel
+from typing import Any
 
 
-class BaseModel(PydanticBaseModel):
-    pass
+class BaseModel:
+    """Plain API model, its fields are declared as class annotations.
+
+    Request bodies are built by the codec from the annotations, so models are as cheap to import as any other
+    class and need no validation library.
+    """
+
+    def __init__(self, **values: Any) -> None:
+        fields = self.model_fields()
+        for name in fields:
+            if name not in values:
+                raise TypeError("%s is missing the field %s" % (type(self).__name__, name))
+        for name, value in values.items():
+            if name not in fields:
+                raise TypeError("%s has no field %s" % (type(self).__name__, name))
+            setattr(self, name, value)
+
+    @classmethod
+    def model_fields(cls) -> dict[str, Any]:
+        """Return the annotated fields of the model and its bases."""
+        fields = {}
+        for base in reversed(cls.__mro__):
+            if issubclass(base, BaseModel):
+                fields.update(base.__dict__.get("__annotations__", {}))
+        return fields
+
+    def dict(self) -> dict:
+        return {name: value.dict() if isinstance(value, BaseModel) else value for name, value in vars(self).items()}
 
 
 class BaseRequest(BaseModel):
@@ -1,5 +1,4 @@
 from dataclasses import dataclass
-from typing import Callable, Any
 
 from .coordinator import CosaCoordinator
 from homeassistant.components.number import NumberEntity, NumberEntityDescription, NumberDeviceClass, UnitOfTemperature
@@ -7,25 +6,15 @@ from homeassistant.const import PRECISION_TENTHS
 from homeassistant.core import callback
 
 from .const import DOMAIN
-from .api import CosaApi
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity
-)
+from .entity import CosaEntity, async_add_endpoint_entities
+from .state import compile_accessor, key_fields
+from .writes import WriteKind
 
 
 @dataclass
 class CosaNumberEntityDescription(NumberEntityDescription):
-    set_value_func: Callable = None
-
-
-async def set_combi_settings(api: CosaApi, endpoint, key: str, value: Any):
-    kwargs = {key: value}
-    await api.set_combi_settings(endpoint, **kwargs)
-
-
-async def set_device_settings(api: CosaApi, endpoint, key: str, value: Any):
-    kwargs = {key: value}
-    await api.set_device_settings(endpoint["id"], **kwargs)
+    write_kind: WriteKind = None
+    write_field: str = None
 
 
 NUMBER_TYPES: tuple[CosaNumberEntityDescription, ...] = (
@@ -37,7 +26,8 @@ NUMBER_TYPES: tuple[CosaNumberEntityDescription, ...] = (
         native_step=PRECISION_TENTHS,
         native_min_value=0.0,
         native_max_value=0.5,
-        set_value_func=set_combi_settings,
+        write_kind=WriteKind.COMBI_SETTINGS,
+        write_field="pid_window_low",
         icon="mdi:thermometer-chevron-down"
     ),
     CosaNumberEntityDescription(
@@ -48,7 +38,8 @@ NUMBER_TYPES: tuple[CosaNumberEntityDescription, ...] = (
         native_step=PRECISION_TENTHS,
         native_min_value=0.1,
         native_max_value=0.5,
-        set_value_func=set_combi_settings,
+        write_kind=WriteKind.COMBI_SETTINGS,
+        write_field="pid_window_high",
         icon="mdi:thermometer-chevron-up"
     ),
     CosaNumberEntityDescription(
@@ -59,7 +50,8 @@ NUMBER_TYPES: tuple[CosaNumberEntityDescription, ...] = (
         native_step=PRECISION_TENTHS,
         native_min_value=-1.0,
         native_max_value=1.0,
-        set_value_func=set_device_settings,
+        write_kind=WriteKind.DEVICE_SETTINGS,
+        write_field="calibration",
         icon="mdi:thermometer"
     ),
 )
@@ -70,44 +62,33 @@ async def async_setup_entry(hass, entry, async_add_entities):
     # assuming API object stored here by __init__.py
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    entities = [
-        CosaNumberEntity(coordinator, idx, entity_description)
-        for idx, ent in enumerate(coordinator.data)
-        for entity_description in NUMBER_TYPES
-    ]
+    def create_entities(endpoint_id: str) -> list[CosaNumberEntity]:
+        return [CosaNumberEntity(coordinator, endpoint_id, entity_description) for entity_description in NUMBER_TYPES]
 
-    async_add_entities(entities)
+    async_add_endpoint_entities(entry, coordinator, async_add_entities, create_entities)
 
 
-class CosaNumberEntity(CoordinatorEntity, NumberEntity):
-    def __init__(self, coordinator: CosaCoordinator, idx: int, entity_description: CosaNumberEntityDescription):
-        super().__init__(coordinator)
-        self.idx = idx
+class CosaNumberEntity(CosaEntity, NumberEntity):
+    def __init__(self, coordinator: CosaCoordinator, endpoint_id: str,
+                 entity_description: CosaNumberEntityDescription):
+        super().__init__(coordinator, endpoint_id)
         self.entity_description: CosaNumberEntityDescription = entity_description
 
-        self.entity_id = "number.cosa_%s_%s" % (entity_description.key, coordinator.data[idx]["name"].lower())
-        self._attr_unique_id = "number.cosa_%s_%s" % (entity_description.key, coordinator.data[idx]["id"])
+        self.endpoint_fields = key_fields(entity_description.key)
+        self._value = compile_accessor(entity_description.key)
 
-        self._update_attrs(self.coordinator.data[self.idx])
+        self.entity_id = "number.cosa_%s_%s" % (entity_description.key, self.endpoint.name.lower())
+        self._attr_unique_id = "number.cosa_%s_%s" % (entity_description.key, endpoint_id)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        self._update_attrs(self.coordinator.data[self.idx])
-        self.async_write_ha_state()
+        self._update_attrs(self.endpoint)
 
     @callback
     def _update_attrs(self, endpoint) -> None:
-        keys = self.entity_description.key.split("|")
-        attr = endpoint
-        for key in keys:
-            attr = attr[key]
+        attr = self._value(endpoint)
 
         self._attr_native_value = attr
 
     async def async_set_native_value(self, value: float) -> None:
-        setattr(self.coordinator.data[self.idx], self.entity_description.key, value)
-        self.coordinator.async_set_updated_data(self.coordinator.data)
-
-        await self.entity_description.set_value_func(self.coordinator.cosa_api, self.coordinator.data[self.idx],
-                                                     self.entity_description.key, value)
-        await self.coordinator.async_request_refresh()
+        self.coordinator.async_update_endpoint(self.endpoint_id, **{self.entity_description.key: value})
+        self.coordinator.writes.async_queue(self.endpoint_id, self.entity_description.write_kind,
+                                            **{self.entity_description.write_field: value})
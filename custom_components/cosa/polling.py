@@ -0,0 +1,96 @@
+import time
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from .state import EndpointState
+
+
+class _EndpointSchedule:
+    __slots__ = ("interval", "next_poll", "signature", "pending_write")
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_poll = 0.0
+        self.signature = None
+        self.pending_write = False
+
+
+class AdaptivePollScheduler:
+    """Picks a poll interval for every endpoint from how fast its state is changing.
+
+    Endpoints whose temperature, combi state or option changed since the previous poll, that are heating or
+    that have a write pending are polled at the minimum interval. Every idle poll doubles the interval up to
+    the maximum.
+    """
+
+    TEMPERATURE_THRESHOLD = 0.1
+    BACKOFF_FACTOR = 2
+
+    def __init__(self, min_interval: timedelta, max_interval: timedelta):
+        self.min_interval = min_interval.total_seconds()
+        self.max_interval = max(max_interval.total_seconds(), self.min_interval)
+        self._schedules: dict[str, _EndpointSchedule] = {}
+
+    def due_endpoints(self, endpoint_ids: Iterable[str], now: Optional[float] = None) -> list[str]:
+        """Return the endpoints that have to be polled in this cycle."""
+        if now is None:
+            now = time.monotonic()
+
+        due = []
+        for endpoint_id in endpoint_ids:
+            schedule = self._schedules.get(endpoint_id)
+            # Allow for some jitter of the coordinator tick so an endpoint is not pushed into the next cycle.
+            if schedule is None or schedule.pending_write or schedule.next_poll - now < self.min_interval / 2:
+                due.append(endpoint_id)
+        return due
+
+    def observe(self, endpoint: EndpointState, now: Optional[float] = None) -> None:
+        """Record a freshly polled endpoint and schedule its next poll."""
+        if now is None:
+            now = time.monotonic()
+
+        schedule = self._schedules.get(endpoint.id)
+        if schedule is None:
+            schedule = self._schedules[endpoint.id] = _EndpointSchedule(self.min_interval)
+
+        signature = (endpoint.temperature, endpoint.combiState, endpoint.option)
+        if schedule.pending_write or endpoint.combiState == "on" or self._changed(schedule.signature, signature):
+            schedule.interval = self.min_interval
+        else:
+            schedule.interval = min(schedule.interval * self.BACKOFF_FACTOR, self.max_interval)
+
+        schedule.signature = signature
+        schedule.pending_write = False
+        schedule.next_poll = now + schedule.interval
+
+    def mark_pending_write(self, endpoint_id: str) -> None:
+        """Poll the endpoint in the next cycle and keep it at the minimum interval after a write."""
+        schedule = self._schedules.get(endpoint_id)
+        if schedule is not None:
+            schedule.pending_write = True
+
+    def interval(self, endpoint_id: str) -> Optional[float]:
+        schedule = self._schedules.get(endpoint_id)
+        return schedule.interval if schedule else None
+
+    def retain(self, endpoint_ids: Iterable[str]) -> None:
+        """Drop the schedules of endpoints that are no longer on the account."""
+        keep = set(endpoint_ids)
+        for endpoint_id in list(self._schedules):
+            if endpoint_id not in keep:
+                del self._schedules[endpoint_id]
+
+    def as_dict(self) -> dict:
+        return {endpoint_id: schedule.interval for endpoint_id, schedule in self._schedules.items()}
+
+    def _changed(self, previous, current) -> bool:
+        if previous is None:
+            return True
+
+        prev_temperature, *prev_state = previous
+        temperature, *state = current
+        if prev_state != state:
+            return True
+        if prev_temperature is None or temperature is None:
+            return prev_temperature != temperature
+        return abs(temperature - prev_temperature) >= self.TEMPERATURE_THRESHOLD
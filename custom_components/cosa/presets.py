@@ -0,0 +1,36 @@
+from typing import Optional
+
+from .const import MIN_TEMPERATURE
+from .models.option import Option
+from .state import EndpointState
+
+PRESETS = [Option.HOME, Option.AWAY, Option.SLEEP, Option.CUSTOM, Option.OFF]
+
+# The endpoint field holding the setpoint of an option, and the set_target_temperatures argument writing it.
+TEMPERATURE_FIELDS = {
+    Option.HOME: ("homeTemperature", "home_temp"),
+    Option.SLEEP: ("sleepTemperature", "sleep_temp"),
+    Option.AWAY: ("awayTemperature", "away_temp"),
+    Option.CUSTOM: ("customTemperature", "custom_temp"),
+}
+
+
+def preset_changes(endpoint: EndpointState, preset_mode: str) -> dict:
+    """Return the endpoint fields that change when a preset is selected."""
+    preset_mode = preset_mode.lower()
+    if preset_mode == Option.OFF:
+        return {"option": Option.FROZEN, "targetTemperature": MIN_TEMPERATURE}
+    field = TEMPERATURE_FIELDS.get(preset_mode, TEMPERATURE_FIELDS[Option.CUSTOM])[0]
+    return {"option": preset_mode, "targetTemperature": getattr(endpoint, field)}
+
+
+def setpoint_changes(endpoint: EndpointState, temperature: float) -> Optional[tuple[dict, dict]]:
+    """Return the endpoint fields that change and the set_target_temperatures arguments for a new setpoint.
+
+    The setpoint applies to the current preset, None if the preset has no setpoint.
+    """
+    fields = TEMPERATURE_FIELDS.get(endpoint.option)
+    if fields is None:
+        return None
+    field, write_field = fields
+    return {field: temperature, "targetTemperature": temperature}, {write_field: temperature}
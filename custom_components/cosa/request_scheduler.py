@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    POLL = 1
+
+
+class _LaneStats:
+    __slots__ = ("requests", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "mean_wait": self.total_wait / self.requests if self.requests else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class RequestScheduler:
+    """Bounds concurrency and rate of the requests to the Cosa cloud.
+
+    Requests acquire a slot which is limited by the number of requests in flight and by a token bucket.
+    Waiting requests are served lane by lane, so interactive writes go ahead of background poll reads.
+    """
+
+    def __init__(self, max_concurrency: int = 4, rate: float = 5.0, burst: int = 10):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+
+        self._active = 0
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._lanes: dict[Priority, deque] = {x: deque() for x in Priority}
+        self._stats: dict[Priority, _LaneStats] = {x: _LaneStats() for x in Priority}
+        self._refill_handle = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(x) for x in self._lanes.values())
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.POLL):
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority) -> None:
+        queued_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append(future)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the waiter got cancelled.
+                self._release()
+            else:
+                try:
+                    self._lanes[priority].remove(future)
+                except ValueError:
+                    pass
+            raise
+
+        self._stats[priority].record(time.monotonic() - queued_at)
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _next_waiter(self):
+        for lane in self._lanes.values():
+            while lane:
+                if not lane[0].done():
+                    return lane
+                lane.popleft()
+        return None
+
+    def _on_refill(self) -> None:
+        self._refill_handle = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._active < self.max_concurrency:
+            lane = self._next_waiter()
+            if lane is None:
+                return
+
+            self._refill()
+            if self._tokens < 1:
+                if self._refill_handle is None:
+                    delay = (1 - self._tokens) / self.rate
+                    self._refill_handle = asyncio.get_running_loop().call_later(delay, self._on_refill)
+                return
+
+            self._tokens -= 1
+            self._active += 1
+            lane.popleft().set_result(None)
+
+    def as_dict(self) -> dict:
+        return {
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "lanes": {x.name.lower(): {"queued": len(self._lanes[x]), **self._stats[x].as_dict()} for x in Priority},
+        }
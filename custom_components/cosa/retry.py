@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import random
+import time
+
+from aiohttp import ClientError
+
+from .exceptions import CannotConnect, CircuitOpen
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def is_transient(err: BaseException) -> bool:
+    """Return whether the error is a transport failure that may succeed on retry.
+
+    Errors reported by the API itself, such as invalid auth or unknown endpoints, are never retried.
+    """
+    if isinstance(err, CircuitOpen):
+        return False
+    return isinstance(err, (CannotConnect, ClientError, asyncio.TimeoutError))
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient errors."""
+
+    def __init__(self, max_tries: int = 3, base_delay: float = 0.25, max_delay: float = 2.0):
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, err: BaseException, tries: int) -> bool:
+        return tries < self.max_tries and is_transient(err)
+
+    def delay(self, tries: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (tries - 1)))
+
+
+class CircuitBreaker:
+    """Fails requests to a host fast after repeated transport failures.
+
+    After `failure_threshold` consecutive failures the breaker opens and rejects requests for `reset_timeout`
+    seconds. Then a single probe request is let through, which closes the breaker on success and opens it
+    again on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+        self._opened_at = 0.0
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until the next probe request is let through, 0 if the breaker is closed."""
+        if self.state == self.CLOSED:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_request(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN and self.retry_after <= 0:
+            _LOGGER.debug("Circuit for %s is half open, sending a probe request", self.host)
+            self.state = self.HALF_OPEN
+            return
+
+        self.rejected += 1
+        raise CircuitOpen(self.host)
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            _LOGGER.info("Connection to %s recovered", self.host)
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state == self.CLOSED:
+                _LOGGER.warning("Too many failed requests to %s, pausing requests for %ss", self.host,
+                                self.reset_timeout)
+            self.state = self.OPEN
+            self.trips += 1
+            self._opened_at = time.monotonic()
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "trips": self.trips,
+            "retry_after": self.retry_after,
+        }
@@ -1,13 +1,14 @@
 from .coordinator import CosaCoordinator
 from .models.option import Option
+from .presets import preset_changes
+from .writes import WriteKind
 from homeassistant.components.select import SelectEntity, SelectEntityDescription
 from homeassistant.core import callback
 
-from .const import DOMAIN, MIN_TEMPERATURE
+from .const import DOMAIN
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity
-)
+from .entity import CosaEntity, async_add_endpoint_entities
+from .state import compile_accessor, key_fields
 
 NUMBER_TYPES: tuple[SelectEntityDescription, ...] = (
     SelectEntityDescription(
@@ -22,37 +23,28 @@ NUMBER_TYPES: tuple[SelectEntityDescription, ...] = (
 async def async_setup_entry(hass, entry, async_add_entities):
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    entities = [
-        CosaSelectEntity(coordinator, idx, entity_description)
-        for idx, ent in enumerate(coordinator.data)
-        for entity_description in NUMBER_TYPES
-    ]
+    def create_entities(endpoint_id: str) -> list[CosaSelectEntity]:
+        return [CosaSelectEntity(coordinator, endpoint_id, entity_description) for entity_description in NUMBER_TYPES]
 
-    async_add_entities(entities)
+    async_add_endpoint_entities(entry, coordinator, async_add_entities, create_entities)
 
 
-class CosaSelectEntity(CoordinatorEntity, SelectEntity):
-    def __init__(self, coordinator: CosaCoordinator, idx: int, entity_description: SelectEntityDescription):
-        super().__init__(coordinator)
-        self.idx = idx
+class CosaSelectEntity(CosaEntity, SelectEntity):
+    def __init__(self, coordinator: CosaCoordinator, endpoint_id: str, entity_description: SelectEntityDescription):
+        super().__init__(coordinator, endpoint_id)
         self.entity_description = entity_description
 
-        self.entity_id = "select.cosa_%s_%s" % (entity_description.key, coordinator.data[idx]["name"].lower())
-        self._attr_unique_id = "select.cosa_%s_%s" % (entity_description.key, coordinator.data[idx]["id"])
+        self.endpoint_fields = key_fields(entity_description.key)
+        self._value = compile_accessor(entity_description.key)
 
-        self._update_attrs(self.coordinator.data[self.idx])
+        self.entity_id = "select.cosa_%s_%s" % (entity_description.key, self.endpoint.name.lower())
+        self._attr_unique_id = "select.cosa_%s_%s" % (entity_description.key, endpoint_id)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        self._update_attrs(self.coordinator.data[self.idx])
-        self.async_write_ha_state()
+        self._update_attrs(self.endpoint)
 
     @callback
     def _update_attrs(self, endpoint) -> None:
-        keys = self.entity_description.key.split("|")
-        attr = endpoint
-        for key in keys:
-            attr = attr[key]
+        attr = self._value(endpoint)
 
         if attr == Option.FROZEN:
             self._attr_current_option = Option.OFF.capitalize()
@@ -60,23 +52,6 @@ class CosaSelectEntity(CoordinatorEntity, SelectEntity):
             self._attr_current_option = attr.capitalize()
 
     async def async_select_option(self, value: str) -> None:
-        endpoint = self.coordinator.data[self.idx]
-        value = value.lower()
-
-        if value == Option.OFF:
-            value = Option.FROZEN
-            target_temp = MIN_TEMPERATURE
-        elif value == Option.HOME:
-            target_temp = endpoint["homeTemperature"]
-        elif value == Option.SLEEP:
-            target_temp = endpoint["sleepTemperature"]
-        elif value == Option.AWAY:
-            target_temp = endpoint["awayTemperature"]
-        else:
-            target_temp = endpoint["customTemperature"]
-
-        self.coordinator.data[self.idx]["option"] = value
-        self.coordinator.data[self.idx]["target_temperature"] = target_temp
-        self.coordinator.async_set_updated_data(self.coordinator.data)
-        await self.coordinator.cosa_api.set_option(endpoint["id"], Option(value))
-        await self.coordinator.async_request_refresh()
+        changes = preset_changes(self.endpoint, value)
+        self.coordinator.async_update_endpoint(self.endpoint_id, **changes)
+        self.coordinator.writes.async_queue(self.endpoint_id, WriteKind.OPTION, option=Option(changes["option"]))
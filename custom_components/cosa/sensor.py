@@ -1,12 +1,17 @@
+from dataclasses import dataclass
+from typing import Any, Callable
+
 from .coordinator import CosaCoordinator
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription, SensorDeviceClass, SensorStateClass, UnitOfTemperature
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
 from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity
-)
+from .entity import CosaEntity, async_add_endpoint_entities
+from .history import EndpointHistory
+from .metrics import LatencyHistogram
+from .state import compile_accessor, key_fields
 
 SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
     SensorEntityDescription(
@@ -26,34 +31,221 @@ SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
 )
 
 
+@dataclass
+class CosaHistorySensorEntityDescription(SensorEntityDescription):
+    value: Callable[[EndpointHistory], float | None] = None
+    precision: int = 0
+
+
+HISTORY_SENSOR_TYPES: tuple[CosaHistorySensorEntityDescription, ...] = (
+    CosaHistorySensorEntityDescription(
+        key="heating_rate",
+        name="Heating Rate",
+        native_unit_of_measurement="%s/h" % UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:thermometer-chevron-up",
+        value=lambda history: history.heating_rate,
+        precision=1,
+    ),
+    CosaHistorySensorEntityDescription(
+        key="time_to_target",
+        name="Time To Target",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        icon="mdi:timer-outline",
+        value=lambda history: history.time_to_target(),
+    ),
+    CosaHistorySensorEntityDescription(
+        key="duty_cycle",
+        name="Heater Duty Cycle",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:fire",
+        value=lambda history: history.duty_cycle,
+    ),
+)
+
+
+@dataclass
+class CosaDiagnosticSensorEntityDescription(SensorEntityDescription):
+    value: Callable[[CosaCoordinator], Any] = None
+
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[CosaDiagnosticSensorEntityDescription, ...] = (
+    CosaDiagnosticSensorEntityDescription(
+        key="api_requests",
+        name="API Requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda coordinator: coordinator.cosa_api.metrics.requests,
+    ),
+    CosaDiagnosticSensorEntityDescription(
+        key="api_retries",
+        name="API Retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda coordinator: coordinator.cosa_api.metrics.retries,
+    ),
+    CosaDiagnosticSensorEntityDescription(
+        key="api_errors",
+        name="API Errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda coordinator: coordinator.cosa_api.metrics.errors,
+    ),
+    CosaDiagnosticSensorEntityDescription(
+        key="poll_cycle_duration",
+        name="Poll Cycle Duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value=lambda coordinator: coordinator.last_cycle_duration,
+    ),
+    CosaDiagnosticSensorEntityDescription(
+        key="last_success",
+        name="Last Successful Poll",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value=lambda coordinator: coordinator.last_success,
+    ),
+)
+
+API_LATENCY_SENSOR = SensorEntityDescription(
+    key="api_latency",
+    name="API Latency",
+    device_class=SensorDeviceClass.DURATION,
+    native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+    state_class=SensorStateClass.MEASUREMENT,
+    suggested_display_precision=0,
+)
+
+
 async def async_setup_entry(hass, entry, async_add_entities):
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
+    def create_entities(endpoint_id: str) -> list[CosaEntity]:
+        entities = [
+            CosaSensorEntity(coordinator, endpoint_id, entity_description)
+            for entity_description in SENSOR_TYPES
+        ]
+        entities.extend(
+            CosaHistorySensorEntity(coordinator, endpoint_id, entity_description)
+            for entity_description in HISTORY_SENSOR_TYPES
+        )
+        return entities
+
+    async_add_endpoint_entities(entry, coordinator, async_add_entities, create_entities)
+
     entities = [
-        CosaSensorEntity(coordinator, idx, entity_description)
-        for idx, ent in enumerate(coordinator.data)
-        for entity_description in SENSOR_TYPES
+        CosaDiagnosticSensorEntity(coordinator, entry.entry_id, entity_description)
+        for entity_description in DIAGNOSTIC_SENSOR_TYPES
     ]
-
+    entities.append(CosaApiLatencySensorEntity(coordinator, entry.entry_id, API_LATENCY_SENSOR))
     async_add_entities(entities)
 
 
-class CosaSensorEntity(CoordinatorEntity, SensorEntity):
-    def __init__(self, coordinator: CosaCoordinator, idx: int, entity_description: SensorEntityDescription):
-        super().__init__(coordinator)
-        self.idx = idx
+class CosaSensorEntity(CosaEntity, SensorEntity):
+    def __init__(self, coordinator: CosaCoordinator, endpoint_id: str, entity_description: SensorEntityDescription):
+        super().__init__(coordinator, endpoint_id)
         self.entity_description = entity_description
 
-        self.entity_id = "sensor.cosa_%s_%s" % (entity_description.key, coordinator.data[idx]["name"].lower())
-        self._attr_unique_id = "sensor.cosa_%s_%s" % (entity_description.key, coordinator.data[idx]["id"])
+        self.endpoint_fields = key_fields(entity_description.key)
+        self._value = compile_accessor(entity_description.key)
+
+        self.entity_id = "sensor.cosa_%s_%s" % (entity_description.key, self.endpoint.name.lower())
+        self._attr_unique_id = "sensor.cosa_%s_%s" % (entity_description.key, endpoint_id)
 
-        self._update_attrs(self.coordinator.data[self.idx])
+        self._update_attrs(self.endpoint)
+
+    @callback
+    def _update_attrs(self, endpoint) -> None:
+        self._attr_native_value = self._value(endpoint)
+
+
+class CosaHistorySensorEntity(CosaEntity, SensorEntity):
+    """Derived from the coordinator's in-memory history of the endpoint, recomputed after every poll cycle."""
+
+    entity_description: CosaHistorySensorEntityDescription
+
+    def __init__(self, coordinator: CosaCoordinator, endpoint_id: str,
+                 entity_description: CosaHistorySensorEntityDescription):
+        super().__init__(coordinator, endpoint_id)
+        self.entity_description = entity_description
+
+        # The values change with every sample, not with single endpoint fields.
+        self.endpoint_fields = frozenset()
+
+        self.entity_id = "sensor.cosa_%s_%s" % (entity_description.key, self.endpoint.name.lower())
+        self._attr_unique_id = "sensor.cosa_%s_%s" % (entity_description.key, endpoint_id)
+
+        self._update_attrs(self.endpoint)
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        self._update_attrs(self.coordinator.data[self.idx])
+        value = self._value()
+        if value == self._attr_native_value:
+            super()._handle_coordinator_update()
+            return
+
+        self._attr_native_value = value
+        self._written_status = self._status()
         self.async_write_ha_state()
 
     @callback
     def _update_attrs(self, endpoint) -> None:
-        self._attr_native_value = endpoint[self.entity_description.key]
+        self._attr_native_value = self._value()
+
+    def _value(self) -> float | None:
+        history = self.coordinator.get_history(self.endpoint_id)
+        value = self.entity_description.value(history) if history is not None else None
+        return round(value, self.entity_description.precision) if value is not None else None
+
+
+class CosaDiagnosticSensorEntity(CoordinatorEntity, SensorEntity):
+    """Reports the health of the connection to the Cosa cloud, updated after every poll cycle."""
+
+    coordinator: CosaCoordinator
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: CosaCoordinator, entry_id: str, entity_description: SensorEntityDescription):
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+
+        self._attr_name = "Cosa %s" % entity_description.name
+        self._attr_unique_id = "sensor.cosa_%s_%s" % (entity_description.key, entry_id)
+
+        self._update_attrs()
+
+    @property
+    def available(self) -> bool:
+        # Failing polls are what these sensors report on.
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._update_attrs()
+        self.async_write_ha_state()
+
+    @callback
+    def _update_attrs(self) -> None:
+        self._attr_native_value = self.entity_description.value(self.coordinator)
+
+
+class CosaApiLatencySensorEntity(CosaDiagnosticSensorEntity):
+    """The 95th percentile of the API response latency since the previous poll cycle, per path in the attributes."""
+
+    def __init__(self, coordinator: CosaCoordinator, entry_id: str, entity_description: SensorEntityDescription):
+        self._snapshots: dict[str, LatencyHistogram] = {}
+        super().__init__(coordinator, entry_id, entity_description)
+
+    @callback
+    def _update_attrs(self) -> None:
+        window = LatencyHistogram()
+        attributes = {}
+        for path, metrics in self.coordinator.cosa_api.metrics.paths.items():
+            latency = metrics.latency.since(self._snapshots[path]) if path in self._snapshots else metrics.latency
+            self._snapshots[path] = metrics.latency.copy()
+            if latency.count:
+                window.merge(latency)
+                attributes[path] = round(latency.percentile(95) * 1000)
+
+        # Without requests in the window there is no current latency to report.
+        self._attr_native_value = round(window.percentile(95) * 1000) if window.count else None
+        self._attr_extra_state_attributes = attributes
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+import voluptuous as vol
+
+from .const import DOMAIN, MIN_TEMPERATURE, MAX_TEMPERATURE
+from .coordinator import CosaCoordinator
+from .models.option import Option
+from .presets import PRESETS, preset_changes, setpoint_changes
+from .writes import WriteKind
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE, Platform
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.entity_platform import async_get_platforms
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SET_PRESET_BULK = "set_preset_bulk"
+SERVICE_SET_TEMPERATURE_BULK = "set_temperature_bulk"
+
+# Same name as the climate attribute, not imported to keep the climate platform off the integration import path.
+ATTR_PRESET_MODE = "preset_mode"
+
+# Writes of a bulk call in flight at once, the request scheduler of the host bounds them further.
+MAX_CONCURRENT_WRITES = 8
+
+SET_PRESET_BULK_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Required(ATTR_PRESET_MODE): vol.All(cv.string, vol.Lower, vol.In(PRESETS)),
+})
+
+SET_TEMPERATURE_BULK_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Required(ATTR_TEMPERATURE): vol.All(vol.Coerce(float), vol.Range(min=MIN_TEMPERATURE, max=MAX_TEMPERATURE)),
+})
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services writing many thermostats in one call.
+
+    The writes run concurrently, each sent right away together with any change queued for the same endpoint,
+    and every coordinator involved is refreshed once when all writes finished. The response holds the outcome
+    of every entity.
+    """
+
+    async def set_preset_bulk(call: ServiceCall) -> ServiceResponse:
+        preset_mode = call.data[ATTR_PRESET_MODE]
+
+        def write(coordinator: CosaCoordinator, endpoint_id: str) -> Callable[[], Awaitable[bool]] | str:
+            changes = preset_changes(coordinator.get_endpoint(endpoint_id), preset_mode)
+            coordinator.async_update_endpoint(endpoint_id, **changes)
+            option = Option(changes["option"])
+            return lambda: coordinator.writes.async_write(endpoint_id, WriteKind.OPTION, option=option)
+
+        return await _async_write_bulk(hass, call.data[ATTR_ENTITY_ID], write)
+
+    async def set_temperature_bulk(call: ServiceCall) -> ServiceResponse:
+        temperature = call.data[ATTR_TEMPERATURE]
+
+        def write(coordinator: CosaCoordinator, endpoint_id: str) -> Callable[[], Awaitable[bool]] | str:
+            endpoint = coordinator.get_endpoint(endpoint_id)
+            changes = setpoint_changes(endpoint, temperature)
+            if changes is None:
+                return "The %s preset has no target temperature" % endpoint.option
+            state_changes, write_fields = changes
+            coordinator.async_update_endpoint(endpoint_id, **state_changes)
+            return lambda: coordinator.writes.async_write(endpoint_id, WriteKind.TARGET_TEMPERATURES, **write_fields)
+
+        return await _async_write_bulk(hass, call.data[ATTR_ENTITY_ID], write)
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_PRESET_BULK, set_preset_bulk, SET_PRESET_BULK_SCHEMA,
+                                 SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, SERVICE_SET_TEMPERATURE_BULK, set_temperature_bulk,
+                                 SET_TEMPERATURE_BULK_SCHEMA, SupportsResponse.OPTIONAL)
+
+
+async def _async_write_bulk(
+        hass: HomeAssistant, entity_ids: list[str],
+        write: Callable[[CosaCoordinator, str], Callable[[], Awaitable[bool]] | str]) -> ServiceResponse:
+    """Run the writes of the given climate entities and return their outcomes by entity id.
+
+    `write` applies the optimistic change and returns the request to send, or the reason the entity is skipped.
+    """
+    # The climate entities of every entry, they know their coordinator and endpoint.
+    entities = {
+        entity_id: entity
+        for platform in async_get_platforms(hass, DOMAIN) if platform.domain == Platform.CLIMATE
+        for entity_id, entity in platform.entities.items()
+    }
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_WRITES)
+    results: dict[str, dict] = {}
+    pending: dict[str, tuple[CosaCoordinator, str, Callable[[], Awaitable[bool]]]] = {}
+
+    for entity_id in entity_ids:
+        entity = entities.get(entity_id)
+        if entity is None:
+            results[entity_id] = {"success": False, "error": "Not a Cosa thermostat"}
+            continue
+        coordinator, endpoint_id = entity.coordinator, entity.endpoint_id
+        if not coordinator.has_endpoint(endpoint_id):
+            results[entity_id] = {"success": False, "error": "Unknown endpoint"}
+            continue
+
+        request = write(coordinator, endpoint_id)
+        if isinstance(request, str):
+            results[entity_id] = {"success": False, "error": request}
+        else:
+            pending[entity_id] = (coordinator, endpoint_id, request)
+
+    async def run(coordinator: CosaCoordinator, endpoint_id: str, request: Callable[[], Awaitable[bool]]) -> dict:
+        async with semaphore:
+            try:
+                ok = await request()
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to write endpoint %s: %s", endpoint_id, err)
+                ok, error = False, str(err) or type(err).__name__
+            else:
+                error = None if ok else "Rejected by the Cosa cloud"
+
+        if not ok:
+            coordinator.async_discard_overlay(endpoint_id)
+        coordinator.scheduler.mark_pending_write(endpoint_id)
+        return {"success": True} if ok else {"success": False, "error": error}
+
+    outcomes = await asyncio.gather(*(run(*x) for x in pending.values()))
+    results.update(zip(pending, outcomes))
+
+    # A single refresh per account confirms the writes, with bulk polling that is one list request.
+    for coordinator in {x[0] for x in pending.values()}:
+        await coordinator.async_request_refresh()
+
+    return {"results": results}
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import ssl as ssl_util
+
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+REQUEST_TIMEOUT = 30
+
+
+class ConnectionStats:
+    """Counts new and reused connections and DNS cache hits of a session."""
+
+    def __init__(self):
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def trace_config(self) -> TraceConfig:
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(self._on_dns_cache_miss)
+        return trace_config
+
+    @property
+    def reuse_ratio(self) -> float:
+        connections = self.created + self.reused
+        return self.reused / connections if connections else 0.0
+
+    async def _on_request_start(self, session: ClientSession, context: SimpleNamespace, params) -> None:
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session: ClientSession, context: SimpleNamespace, params) -> None:
+        self.created += 1
+
+    async def _on_connection_reuseconn(self, session: ClientSession, context: SimpleNamespace, params) -> None:
+        self.reused += 1
+
+    async def _on_dns_cache_hit(self, session: ClientSession, context: SimpleNamespace, params) -> None:
+        self.dns_hits += 1
+
+    async def _on_dns_cache_miss(self, session: ClientSession, context: SimpleNamespace, params) -> None:
+        self.dns_misses += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "connections_created": self.created,
+            "connections_reused": self.reused,
+            "reuse_ratio": self.reuse_ratio,
+            "dns_cache_hits": self.dns_hits,
+            "dns_cache_misses": self.dns_misses,
+        }
+
+
+def create_session(max_connections: int, stats: ConnectionStats) -> ClientSession:
+    """Create a session that keeps a pool of persistent connections to a single host.
+
+    The pool is sized to the request scheduler's concurrency, so every request slot keeps its own
+    connection alive between poll cycles instead of going through a new TLS handshake.
+    """
+    connector = TCPConnector(
+        limit=max_connections,
+        limit_per_host=max_connections,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        # Home Assistant's shared context, aiohttp would otherwise load the CA files inside the event loop.
+        ssl=ssl_util.get_default_context(),
+    )
+    return ClientSession(
+        connector=connector,
+        timeout=ClientTimeout(total=REQUEST_TIMEOUT),
+        headers={"User-Agent": SERVER_SOFTWARE},
+        trace_configs=[stats.trace_config()],
+    )
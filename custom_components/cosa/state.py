@@ -0,0 +1,91 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable
+
+
+class EndpointState:
+    """Compact snapshot of the endpoint fields used by the platforms.
+
+    States are not modified once they are in the coordinator data, changes are applied by swapping in a copy.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "mode",
+        "option",
+        "previousOption",
+        "temperature",
+        "humidity",
+        "targetTemperature",
+        "homeTemperature",
+        "awayTemperature",
+        "sleepTemperature",
+        "customTemperature",
+        "combiState",
+        "pidWindowLow",
+        "pidWindowHigh",
+        "calibration",
+        "place",
+    )
+
+    def __init__(self, **fields: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_payload(cls, endpoint: dict) -> "EndpointState":
+        """Build a state from a raw getEndpoint payload, dropping everything that is not used."""
+        state = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(state, name, endpoint.get(name))
+        combi_settings = endpoint.get("combiSettings")
+        if combi_settings:
+            state.pidWindowLow = combi_settings.get("pidWindowLow", state.pidWindowLow)
+            state.pidWindowHigh = combi_settings.get("pidWindowHigh", state.pidWindowHigh)
+        return state
+
+    @classmethod
+    def payload_fields(cls, endpoint: dict) -> frozenset[str]:
+        """Return the names of the fields a raw payload carries."""
+        fields = {name for name in cls.__slots__ if name in endpoint}
+        combi_settings = endpoint.get("combiSettings")
+        if combi_settings:
+            fields.update(name for name in ("pidWindowLow", "pidWindowHigh") if name in combi_settings)
+        return frozenset(fields)
+
+    def replace(self, **changes: Any) -> "EndpointState":
+        state = EndpointState.__new__(EndpointState)
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        for name, value in changes.items():
+            setattr(state, name, value)
+        return state
+
+    def diff(self, other: "EndpointState | None") -> frozenset[str]:
+        """Return the names of the fields that differ from the other state."""
+        if other is None:
+            return frozenset(self.__slots__)
+        return frozenset(name for name in self.__slots__ if getattr(self, name) != getattr(other, name))
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EndpointState):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return "EndpointState(id=%r, name=%r)" % (self.id, self.name)
+
+
+@lru_cache(maxsize=None)
+def compile_accessor(key: str) -> Callable[[EndpointState], Any]:
+    """Compile an entity description key, with "|" separating nested attributes, into a getter."""
+    return attrgetter(key.replace("|", "."))
+
+
+def key_fields(key: str) -> frozenset[str]:
+    """Return the state fields an entity description key depends on."""
+    return frozenset((key.split("|", 1)[0],))
@@ -0,0 +1,109 @@
+import logging
+from enum import StrEnum
+from functools import partial
+from typing import Any, TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+
+if TYPE_CHECKING:
+    from .coordinator import CosaCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WriteKind(StrEnum):
+    OPTION = "option"
+    TARGET_TEMPERATURES = "target_temperatures"
+    COMBI_SETTINGS = "combi_settings"
+    DEVICE_SETTINGS = "device_settings"
+
+
+class WriteCoalescer:
+    """Merges rapid successive writes to an endpoint into a single request per kind.
+
+    Changed fields are collected per endpoint and write kind, the last written value of a field wins.
+    The merged fields are sent once the cooldown after the first queued change has passed.
+    """
+
+    COOLDOWN = 0.5
+
+    def __init__(self, hass: HomeAssistant, coordinator: "CosaCoordinator"):
+        self.hass = hass
+        self.coordinator = coordinator
+
+        self.queued = 0
+        self.requests = 0
+
+        self._pending: dict[tuple[str, WriteKind], dict[str, Any]] = {}
+        self._debouncers: dict[tuple[str, WriteKind], Debouncer] = {}
+
+    @callback
+    def async_queue(self, endpoint_id: str, kind: WriteKind, **fields) -> None:
+        key = (endpoint_id, kind)
+        self._pending.setdefault(key, {}).update(fields)
+        self.queued += 1
+
+        debouncer = self._debouncers.get(key)
+        if debouncer is None:
+            debouncer = self._debouncers[key] = Debouncer(
+                self.hass,
+                _LOGGER,
+                cooldown=self.COOLDOWN,
+                immediate=False,
+                function=partial(self._async_flush, endpoint_id, kind),
+            )
+        debouncer.async_schedule_call()
+
+    async def async_flush(self) -> None:
+        """Send all pending writes right away."""
+        for debouncer in self._debouncers.values():
+            debouncer.async_cancel()
+        for endpoint_id, kind in list(self._pending):
+            await self._async_flush(endpoint_id, kind)
+
+    async def async_write(self, endpoint_id: str, kind: WriteKind, **fields) -> bool:
+        """Send a write right away, merged with the changes queued for the same endpoint and kind.
+
+        The queued changes are sent with it, so they cannot land after it and overwrite it. The endpoint is not
+        refreshed, the caller refreshes once for all of its writes. Returns whether the cloud accepted the write.
+        """
+        key = (endpoint_id, kind)
+        debouncer = self._debouncers.get(key)
+        if debouncer is not None:
+            debouncer.async_cancel()
+        self.queued += 1
+        return await self._async_send(endpoint_id, kind, {**self._pending.pop(key, {}), **fields})
+
+    async def _async_flush(self, endpoint_id: str, kind: WriteKind) -> None:
+        fields = self._pending.pop((endpoint_id, kind), None)
+        if not fields:
+            return
+
+        try:
+            await self._async_send(endpoint_id, kind, fields)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Failed to write %s of endpoint %s", kind, endpoint_id)
+            # The optimistic values did not reach the cloud, let the refresh below restore the actual state.
+            self.coordinator.async_discard_overlay(endpoint_id)
+
+        self.coordinator.scheduler.mark_pending_write(endpoint_id)
+        await self.coordinator.async_refresh_endpoint(endpoint_id)
+
+    async def _async_send(self, endpoint_id: str, kind: WriteKind, fields: dict[str, Any]) -> bool:
+        self.requests += 1
+        api = self.coordinator.cosa_api
+        if kind == WriteKind.OPTION:
+            return await api.set_option(endpoint_id, fields["option"])
+        if kind == WriteKind.TARGET_TEMPERATURES:
+            return await api.set_target_temperatures(self.coordinator.get_endpoint(endpoint_id), **fields)
+        if kind == WriteKind.COMBI_SETTINGS:
+            return await api.set_combi_settings(self.coordinator.get_endpoint(endpoint_id), **fields)
+        return await api.set_device_settings(endpoint_id, **fields)
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": self.queued,
+            "requests": self.requests,
+            "pending": len(self._pending),
+        }